@@ -0,0 +1,219 @@
+"""Run queued API job actions."""
+
+# Standard Library
+import os
+import time
+import socket
+import asyncio
+import secrets
+from typing import Set, Dict, List, Callable, Optional, Awaitable
+
+# Project
+from stats.log import log
+from stats.config import params
+from stats.metrics import JOB_ACTIONS_RUNNING
+from stats.auth.main import update_jobs, complete_jobs
+from stats.auth.queue import (
+    QueueEntry,
+    renew_lease,
+    lease_entries,
+    finish_entries,
+    next_available,
+    release_entries,
+)
+from stats.auth.notify import queue_notifier
+from stats.actions.policy import ACTIONS
+
+Action = Callable[..., Awaitable[Optional[str]]]
+
+
+class JobExecutor:
+    """Lease & run queued job actions.
+
+    The queue is checked whenever entries are queued or finished, by this
+    or another process, when the next queued entry becomes available, and
+    at least every `poll_interval` seconds.
+
+    Leases are renewed while their action runs. If an action fails, its
+    entries are retried with exponential backoff, until they've been
+    attempted `max_attempts` times, at which point their jobs are
+    completed with the error as their detail.
+    """
+
+    def __init__(
+        self,
+        actions: Dict[str, Action],
+        slots: int,
+        lease_ttl: float,
+        max_attempts: int,
+        retry_backoff: float,
+        poll_interval: float,
+        coalesce_window: float = 0.0,
+        batch_size: int = 100,
+    ) -> None:
+        """Initialize JobExecutor()."""
+        self.actions = actions
+        self.slots = slots
+        self.lease_ttl = lease_ttl
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.poll_interval = poll_interval
+        self.coalesce_window = coalesce_window
+        self.batch_size = batch_size
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+        self._task: Optional[asyncio.Task] = None
+        self._running: Set[asyncio.Task] = set()
+
+    async def _lease(self) -> bool:
+        """Lease & start running the next available action, if any."""
+        owner = f"{self.name}:{secrets.token_hex(4)}"
+        entries = await lease_entries(
+            owner,
+            ttl=self.lease_ttl,
+            slots=self.slots,
+            batch_size=self.batch_size,
+            horizon=self.coalesce_window,
+        )
+
+        if not entries:
+            return False
+
+        task = asyncio.ensure_future(self._execute(owner, entries))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+        return True
+
+    async def _renew(self, owner: str) -> None:
+        while True:
+            await asyncio.sleep(self.lease_ttl / 3)
+            try:
+                await renew_lease(owner, self.lease_ttl)
+            except Exception as err:
+                log.error("Error renewing lease {}: {}", owner, repr(err))
+
+    async def _fail(self, entries: List[QueueEntry], error: str) -> None:
+        """Complete jobs that won't be retried, with the error as their detail."""
+        job_ids = [entry.job_id for entry in entries]
+        await update_jobs(job_ids, detail=error)
+        await complete_jobs(job_ids)
+        await finish_entries([entry.id for entry in entries])
+
+    async def _execute(self, owner: str, entries: List[QueueEntry]) -> None:
+        """Run an action for all leased entries."""
+        action_name = entries[0].action
+        action = self.actions.get(action_name)
+
+        if action is None:
+            await self._fail(entries, f"Unknown action '{action_name}'")
+            return
+
+        exhausted = [entry for entry in entries if entry.attempts > self.max_attempts]
+
+        if exhausted:
+            await self._fail(
+                exhausted, f"{action_name} failed after {self.max_attempts} attempts"
+            )
+            entries = [entry for entry in entries if entry not in exhausted]
+            if not entries:
+                return
+
+        job_ids = [entry.job_id for entry in entries]
+        renewer = asyncio.ensure_future(self._renew(owner))
+        JOB_ACTIONS_RUNNING.inc()
+
+        try:
+            # Coalesced entries are run once, with the first entry's arguments.
+            message = await action(job_ids, **entries[0].args)
+
+        except asyncio.CancelledError:
+            # Shutting down, so let another executor run the entries now.
+            await release_entries([entry.id for entry in entries])
+            raise
+
+        except Exception as err:
+            error = str(err) or type(err).__name__
+            retry = [entry for entry in entries if entry.attempts < self.max_attempts]
+            final = [entry for entry in entries if entry not in retry]
+
+            if retry:
+                delay = self.retry_backoff * 2 ** (retry[0].attempts - 1)
+                log.warning("Retrying {} in {}s: {}", action_name, delay, error)
+                await update_jobs(
+                    [entry.job_id for entry in retry],
+                    detail=f"Attempt {retry[0].attempts} failed: {error}",
+                )
+                await release_entries([entry.id for entry in retry], delay=delay)
+
+            if final:
+                await self._fail(final, error)
+
+            return
+
+        finally:
+            renewer.cancel()
+            JOB_ACTIONS_RUNNING.dec()
+
+        if message is not None:
+            await update_jobs(job_ids, detail=message)
+        await complete_jobs(job_ids)
+        await finish_entries([entry.id for entry in entries])
+
+    async def _next_delay(self, leased: bool) -> float:
+        """Get the time to wait before checking the queue again."""
+        available = await next_available()
+
+        if available is None:
+            return self.poll_interval
+
+        delay = available - time.time()
+
+        if delay <= 0 and not leased:
+            # Available, but not leasable until a running action finishes,
+            # which is signaled by the queue notifier.
+            return self.poll_interval
+
+        return min(max(delay, 0), self.poll_interval)
+
+    async def run_once(self) -> float:
+        """Lease all leasable actions, returning the time until the next check."""
+        leased = False
+        while await self._lease():
+            leased = True
+        return await self._next_delay(leased)
+
+    async def _run(self) -> None:
+        while True:
+            change = queue_notifier.listen()
+            try:
+                delay = await self.run_once()
+            except Exception as err:
+                log.error("Error leasing queued jobs: {}", repr(err))
+                delay = self.poll_interval
+            await change.wait(delay)
+
+    async def start(self) -> None:
+        """Start running queued jobs."""
+        self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        """Stop running queued jobs, releasing the entries of running actions."""
+        tasks = list(self._running)
+
+        if self._task is not None:
+            tasks.append(self._task)
+            self._task = None
+
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+job_executor = JobExecutor(
+    actions=ACTIONS,
+    slots=params.jobs.executor_slots,
+    lease_ttl=params.jobs.lease_ttl,
+    max_attempts=params.jobs.max_attempts,
+    retry_backoff=params.jobs.retry_backoff,
+    poll_interval=params.jobs.queue_poll,
+    coalesce_window=params.policy_server.coalesce_window,
+)
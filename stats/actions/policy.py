@@ -1,61 +1,74 @@
 """Route Policy Server Interaction."""
 
 # Standard Library
+import asyncio
 from socket import gaierror
-from typing import Sequence, Generator
-
-# Third Party
-import rpyc
-from rpyc.core import Connection
+from typing import Dict, List, Callable, Optional, Awaitable
 
 # Project
 from stats.log import log
 from stats.config import params
-from stats.auth.main import update_job, complete_job
+from stats.rpc.pool import RpcPool
 from stats.exceptions import StatsError
-
-
-async def _remote_call(method: str, job_id: int, job_name: str, *args, **kwargs):
-    log.info("Job {}: Starting {}", job_id, job_name)
-    result = None
+from stats.auth.detail import JobDetailWriter
+
+policy_server = RpcPool(
+    host=params.policy_server.host,
+    port=params.policy_server.port,
+    size=params.policy_server.pool_size,
+    timeout=params.policy_server.timeout,
+    connect_timeout=params.policy_server.connect_timeout,
+    heartbeat=params.policy_server.heartbeat,
+)
+
+
+async def _remote_call(
+    method: str, job_ids: List[int], job_name: str, *args, **kwargs
+) -> None:
+    """Call a policy server method, streaming its output to the jobs' detail."""
+    jobs = ", ".join(str(job_id) for job_id in job_ids)
+    log.info("Jobs {}: Starting {}", jobs, job_name)
+
+    writer = JobDetailWriter(
+        job_ids,
+        flush_interval=params.jobs.detail_flush_interval,
+        flush_size=params.jobs.detail_flush_size,
+        max_length=params.jobs.detail_max_length,
+    )
 
     try:
-        connection: Connection = rpyc.connect(
-            params.policy_server.host, params.policy_server.port, ipv6=True,
-        )
-        call = getattr(connection.root, method)
-        result = call(*args, **kwargs)
-
-        if isinstance(result, str):
-            message = result
-        elif isinstance(result, (Sequence, Generator)):
-            message = ", ".join(result)
-        else:
-            message = ""
-
-        await update_job(job_id, detail=message)
+        async with writer:
+            async for line in policy_server.stream(method, *args, **kwargs):
+                await writer.write(line)
 
     except (ConnectionRefusedError, gaierror) as err:
         log.error(str(err))
-        await update_job(job_id, in_progress=False, detail=str(err))
         raise StatsError(str(err))
 
-    except TimeoutError as err:
-        await update_job(job_id, in_progress=False, detail=str(err))
-        log.error(str(err))
-        pass
+    except (TimeoutError, asyncio.TimeoutError) as err:
+        detail = str(err) or f"{job_name} timed out"
+        log.error(detail)
+        raise StatsError(detail)
 
-    await complete_job(job_id)
-    log.success("Job: {}: Completed {}", job_id, job_name)
+    log.success("Jobs {}: Completed {}", jobs, job_name)
 
 
-async def _update_policy(wait: int, job: int) -> None:
+async def _update_policy(jobs: List[int], wait: int = 1) -> None:
     """Signal the routing policy server to manually update its policy."""
 
-    await _remote_call("update_policy", job, "Policy Update", wait=wait)
+    await _remote_call("update_policy", jobs, "Policy Update", wait=wait)
 
 
-async def _update_switch_acl(job: int) -> None:
+async def _update_switch_acl(jobs: List[int]) -> None:
     """Signal the routing policy server to manually update switch ACLs."""
 
-    await _remote_call("update_acls", job, "Switch ACL Update")
+    await _remote_call("update_acls", jobs, "Switch ACL Update")
+
+
+# Queued job actions, by name. Each is called with the IDs of the jobs
+# being run & the arguments they were queued with, and either writes the
+# jobs' detail itself, or returns the jobs' detail message.
+ACTIONS: Dict[str, Callable[..., Awaitable[Optional[str]]]] = {
+    "update_policy": _update_policy,
+    "update_acls": _update_switch_acl,
+}
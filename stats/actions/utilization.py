@@ -23,7 +23,7 @@ async def port_utilization_period(
             .FILL("none")
             .LIMIT(limit)
         )
-        return await q.query()
+        return await q.query(kind="port_utilization")
 
 
 async def port_utilization_range(
@@ -40,7 +40,7 @@ async def port_utilization_range(
             .FILL("none")
             .LIMIT(limit)
         )
-        return await q.query()
+        return await q.query(kind="port_utilization")
 
 
 async def port_average_period(port_id: str, direction: str, period: int, limit: int):
@@ -52,7 +52,7 @@ async def port_average_period(port_id: str, direction: str, period: int, limit:
         f"time > now() - {period}h GROUP BY time(1m) fill(previous)) LIMIT {limit}",
     )
     async with Influx("telegraf") as db:
-        return await db.query(raw=" ".join(parts))
+        return await db.query(raw=" ".join(parts), kind="port_average")
 
 
 async def port_average_range(
@@ -72,7 +72,7 @@ async def port_average_range(
     parts += ("GROUP BY time(1m) fill(previous))",)
 
     async with Influx("telegraf") as db:
-        return await db.query(raw=" ".join(parts))
+        return await db.query(raw=" ".join(parts), kind="port_average")
 
 
 async def overall_utilization_period(direction: str, period: int, limit: int):
@@ -86,7 +86,7 @@ async def overall_utilization_period(direction: str, period: int, limit: int):
             .FILL("none")
             .LIMIT(limit)
         )
-        return await q.query()
+        return await q.query(kind="overall_utilization")
 
 
 async def overall_utilization_average_period(direction: str, period: int, limit: int):
@@ -98,7 +98,7 @@ async def overall_utilization_average_period(direction: str, period: int, limit:
         f"time > now() - {period}h GROUP BY time(1m) fill(previous)) LIMIT {limit}",
     )
     async with Influx("telegraf") as db:
-        return await db.query(raw=" ".join(parts))
+        return await db.query(raw=" ".join(parts), kind="overall_average")
 
 
 async def overall_utilization_max_period(direction: str, period: int, limit: int):
@@ -110,4 +110,4 @@ async def overall_utilization_max_period(direction: str, period: int, limit: int
         f"time > now() - {period}h GROUP BY time(1m) fill(previous)) LIMIT {limit}",
     )
     async with Influx("telegraf") as db:
-        return await db.query(raw=" ".join(parts))
+        return await db.query(raw=" ".join(parts), kind="overall_max")
@@ -0,0 +1,235 @@
+"""HTTP caching & conditional request handling."""
+
+# Standard Library
+import math
+import time
+import hashlib
+from typing import Callable, Optional
+from collections import OrderedDict
+from email.utils import formatdate
+
+# Third Party
+import pendulum
+from starlette.requests import Request
+from starlette.responses import Response
+
+# Project
+from stats.config import params
+from stats.metrics import CACHE_REQUESTS, RESPONSE_CACHE_BYTES
+from stats.constants import GRANULARITY
+
+# Cache lifetime for time ranges that have fully elapsed.
+IMMUTABLE_MAX_AGE = 31536000
+
+_HITS = CACHE_REQUESTS.labels("response", "hit")
+_MISSES = CACHE_REQUESTS.labels("response", "miss")
+
+
+def _epoch(timestamp: Optional[str]) -> Optional[int]:
+    """Parse a query timestamp to UNIX epoch seconds."""
+    if timestamp is None:
+        return None
+    return pendulum.parse(timestamp, tz="UTC", strict=False).int_timestamp
+
+
+def _opaque_tag(etag: str) -> str:
+    """Strip the weakness indicator from an ETag."""
+    etag = etag.strip()
+    if etag.startswith("W/"):
+        return etag[2:]
+    return etag
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weakly compare an If-None-Match header value against an ETag."""
+    if not if_none_match:
+        return False
+
+    opaque = _opaque_tag(etag)
+    candidates = (_opaque_tag(tag) for tag in if_none_match.split(","))
+    return any(tag in ("*", opaque) for tag in candidates)
+
+
+class CachePolicy:
+    """Caching validators & lifetime for a time series request.
+
+    The validator is derived from the request itself and the query window,
+    aligned to the InfluxDB `GROUP BY time()` bucket. Requests for a
+    relative period are therefore identical until the current bucket
+    closes. Points can arrive late, so a time range is only treated as
+    historical, and never changing, once it ended more than
+    `api.cache_settle` seconds ago. Until then, it's cached like a
+    relative period. Because no data is needed to build the validator,
+    matching conditional requests can be answered before any query is made.
+    """
+
+    def __init__(
+        self,
+        request: Request,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        granularity: int = GRANULARITY,
+    ) -> None:
+        """Compute the ETag & lifetime for a request."""
+        now = time.time()
+        bucket = int(now // granularity) * granularity
+        end_time = _epoch(end)
+
+        self.request = request
+        self.immutable = (
+            end_time is not None and end_time < now - params.api.cache_settle
+        )
+
+        if self.immutable:
+            window = (_epoch(start), end_time)
+            self.max_age = IMMUTABLE_MAX_AGE
+        else:
+            window = (bucket,)
+            self.max_age = max(math.ceil(bucket + granularity - now), 1)
+
+        key = (
+            request.url.path,
+            str(request.query_params),
+            request.headers.get("accept", ""),
+            *window,
+        )
+        digest = hashlib.blake2b(repr(key).encode(), digest_size=12).hexdigest()
+        self.etag = f'W/"{digest}"'
+
+    @property
+    def cache_control(self) -> str:
+        """Build the Cache-Control header value."""
+        if self.immutable:
+            return f"public, max-age={self.max_age}, immutable"
+        return f"public, max-age={self.max_age}"
+
+    @property
+    def headers(self):
+        """Get caching headers common to full & 304 responses."""
+        return {
+            "etag": self.etag,
+            "cache-control": self.cache_control,
+            "vary": "Accept",
+        }
+
+    def not_modified(self) -> Optional[Response]:
+        """Get a 304 response if the client already has this representation."""
+        if _etag_matches(self.request.headers.get("if-none-match"), self.etag):
+            return Response(status_code=304, headers=self.headers)
+        return None
+
+    def apply(self, response: Response, last_modified: Optional[int] = None):
+        """Add caching headers to a response."""
+        response.headers.update(self.headers)
+
+        if last_modified is not None:
+            response.headers["last-modified"] = formatdate(last_modified, usegmt=True)
+
+        return response
+
+
+class CachedResponse:
+    """Complete response body & headers, with compressed variants."""
+
+    __slots__ = ("body", "status_code", "headers", "expires", "encoded")
+
+    def __init__(self, response: Response, expires: float) -> None:
+        """Initialize CachedResponse()."""
+        self.body = response.body
+        self.status_code = response.status_code
+        self.headers = {
+            key: value
+            for key, value in response.headers.items()
+            if key != "content-length"
+        }
+        self.expires = expires
+        self.encoded = {}
+
+    @property
+    def size(self) -> int:
+        """Get the total size of all stored bodies."""
+        return len(self.body) + sum(len(body) for body in self.encoded.values())
+
+    def response(self) -> Response:
+        """Create a new response from the cached body."""
+        return Response(
+            content=self.body, status_code=self.status_code, headers=self.headers
+        )
+
+
+class ResponseCache:
+    """In-memory LRU cache of complete responses, keyed by ETag.
+
+    Compressed variants of each response are stored alongside it, so a hot
+    response is compressed once per encoding rather than once per request.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int) -> None:
+        """Initialize ResponseCache()."""
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+
+    def __len__(self) -> int:
+        """Get the number of cached responses."""
+        return len(self._entries)
+
+    def _evict(self) -> None:
+        while self._entries and (
+            len(self._entries) > self.max_entries or self.size > self.max_bytes
+        ):
+            _, entry = self._entries.popitem(last=False)
+            self.size -= entry.size
+
+    def get(self, etag: str) -> Optional[CachedResponse]:
+        """Get an unexpired cached response."""
+        entry = self._entries.get(etag)
+
+        if entry is None:
+            _MISSES.inc()
+            return None
+
+        if entry.expires <= time.time():
+            del self._entries[etag]
+            self.size -= entry.size
+            RESPONSE_CACHE_BYTES.set(self.size)
+            _MISSES.inc()
+            return None
+
+        self._entries.move_to_end(etag)
+        _HITS.inc()
+        return entry
+
+    def put(self, policy: CachePolicy, response: Response) -> Response:
+        """Cache a complete response for the lifetime of its cache policy."""
+        body = getattr(response, "body", None)
+
+        if response.status_code == 200 and body and len(body) <= self.max_bytes:
+            entry = CachedResponse(response, expires=time.time() + policy.max_age)
+            previous = self._entries.pop(policy.etag, None)
+            if previous is not None:
+                self.size -= previous.size
+            self._entries[policy.etag] = entry
+            self.size += entry.size
+            self._evict()
+            RESPONSE_CACHE_BYTES.set(self.size)
+
+        return response
+
+    def encoded(
+        self, etag: str, body: bytes, encoding: str, encoder: Callable[[bytes], bytes]
+    ) -> bytes:
+        """Get a compressed body, compressing & storing it on the first request."""
+        entry = self._entries.get(etag)
+
+        if entry is None or entry.body != body:
+            return encoder(body)
+
+        if encoding not in entry.encoded:
+            entry.encoded[encoding] = encoder(body)
+            self.size += len(entry.encoded[encoding])
+            self._evict()
+            RESPONSE_CACHE_BYTES.set(self.size)
+
+        return entry.encoded[encoding]
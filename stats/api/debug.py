@@ -0,0 +1,128 @@
+"""API Endpoints for Diagnostics."""
+
+# Standard Library
+import os
+import tracemalloc
+from typing import Optional
+from datetime import datetime
+
+# Third Party
+from fastapi import Query, Header
+from starlette.responses import Response, PlainTextResponse
+
+# Project
+from stats.config import params
+from stats.memory import (
+    rss_bytes,
+    stage_peaks,
+    endpoint_peaks,
+    peak_rss_bytes,
+    top_allocations,
+    peak_allocations,
+)
+from stats.profiling import profile_calls, sample_stacks
+from stats.api.policy import _verify_auth
+from stats.models.debug import (
+    QuerySort,
+    ProfileMode,
+    QueryReport,
+    MemoryReport,
+    AllocationGroup,
+)
+from stats.database.slowlog import query_log
+
+
+async def queries(
+    sort: QuerySort = QuerySort.total,
+    limit: int = Query(20, ge=1, le=500),
+    reset: bool = False,
+    x_48ix_api_user: Optional[str] = Header(None),
+    x_48ix_api_key: Optional[str] = Header(None),
+    authorization: Optional[str] = Header(None),
+):
+    """Get InfluxDB query statistics by fingerprint, highest `sort` first.
+
+    Statistics are kept by each worker process, so only the statistics of
+    the worker handling the request are returned. If `reset` is set, the
+    worker's statistics are cleared after they're returned.
+    """
+    await _verify_auth(x_48ix_api_user, x_48ix_api_key, "/debug/queries", authorization)
+    report = QueryReport(
+        pid=os.getpid(),
+        since=datetime.fromtimestamp(query_log.since),
+        threshold=query_log.threshold,
+        fingerprints=[stats.dict() for stats in query_log.top(sort.value, limit)],
+    )
+    if reset:
+        query_log.reset()
+    return report.dict()
+
+
+async def memory(
+    limit: int = Query(20, ge=1, le=500),
+    group_by: AllocationGroup = AllocationGroup.lineno,
+    x_48ix_api_user: Optional[str] = Header(None),
+    x_48ix_api_key: Optional[str] = Header(None),
+    authorization: Optional[str] = Header(None),
+):
+    """Get the memory usage of the worker handling the request.
+
+    If allocations are traced, the peak memory allocated per endpoint &
+    per stage, and the `limit` source locations with the most memory
+    currently allocated, are included. Finding those locations snapshots
+    every traced allocation while holding the GIL, which stalls the whole
+    worker for as long as it takes, in proportion to the number of live
+    allocations rather than `limit`.
+    """
+    await _verify_auth(x_48ix_api_user, x_48ix_api_key, "/debug/memory", authorization)
+
+    tracing = tracemalloc.is_tracing()
+    traced = top = None
+
+    if tracing:
+        traced = tracemalloc.get_traced_memory()[0]
+        top = top_allocations(group_by.value, limit)
+
+    report = MemoryReport(
+        pid=os.getpid(),
+        rss=rss_bytes(),
+        peak_rss=peak_rss_bytes(),
+        tracing=tracing,
+        traced=traced,
+        endpoints=peak_allocations(endpoint_peaks),
+        stages=peak_allocations(stage_peaks),
+        top=top or [],
+    )
+    return report.dict()
+
+
+async def profile(
+    seconds: float = Query(10, gt=0, le=params.profiling.max_seconds),
+    mode: ProfileMode = ProfileMode.sample,
+    all_threads: bool = False,
+    x_48ix_api_user: Optional[str] = Header(None),
+    x_48ix_api_key: Optional[str] = Header(None),
+    authorization: Optional[str] = Header(None),
+):
+    """Profile the worker handling the request for `seconds`.
+
+    In `sample` mode, the event loop thread's stacks (or every thread's,
+    if `all_threads` is set) are sampled & returned as collapsed stacks.
+    In `cprofile` mode, every call on the event loop thread is profiled &
+    returned as a `pstats` file. Only one profile runs at a time.
+    """
+    await _verify_auth(x_48ix_api_user, x_48ix_api_key, "/debug/profile", authorization)
+    if mode == ProfileMode.cprofile:
+        content = await profile_calls(seconds)
+        return Response(
+            content,
+            media_type="application/octet-stream",
+            headers={
+                "content-disposition": f'attachment; filename="{os.getpid()}.prof"'
+            },
+        )
+
+    content = await sample_stacks(
+        seconds, params.profiling.sample_interval, all_threads=all_threads
+    )
+    return PlainTextResponse(content)
@@ -1,7 +1,15 @@
 """FastAPI Events."""
 
 # Project
-from stats.auth.main import authdb_stop, authdb_start
+from stats.config import params
+from stats.memory import stop_tracing, start_tracing, memory_monitor
+from stats.watchdog import loop_monitor
+from stats.auth.main import db_watcher, authdb_stop, authdb_start
+from stats.auth.index import auth_index
+from stats.auth.notify import job_notifier, queue_notifier
+from stats.actions.policy import policy_server
+from stats.auth.retention import retention_task
+from stats.actions.executor import job_executor
 
 
 async def startup_authdb() -> None:
@@ -12,3 +20,69 @@ async def startup_authdb() -> None:
 async def shutdown_authdb() -> None:
     """Disconnect from auth database on shutdown."""
     await authdb_stop()
+
+
+async def startup_auth_index() -> None:
+    """Load the authorization index & reload it when users or routes change."""
+    await auth_index.load()
+    db_watcher.subscribe(auth_index.refresh)
+    # Jobs changed by other workers are only detected by the watcher.
+    db_watcher.subscribe(job_notifier.notify_all)
+    db_watcher.subscribe(queue_notifier.notify_all)
+    await db_watcher.start()
+
+
+async def shutdown_auth_index() -> None:
+    """Stop watching for database changes."""
+    await db_watcher.stop()
+
+
+async def startup_job_retention() -> None:
+    """Start pruning old jobs periodically."""
+    await retention_task.start()
+
+
+async def shutdown_job_retention() -> None:
+    """Stop pruning old jobs."""
+    await retention_task.stop()
+
+
+async def shutdown_policy_server() -> None:
+    """Close idle policy server connections."""
+    policy_server.close()
+
+
+async def startup_job_executor() -> None:
+    """Run queued jobs in this process, unless a dedicated executor is used."""
+    if params.jobs.embedded_executor:
+        await job_executor.start()
+
+
+async def shutdown_job_executor() -> None:
+    """Stop running queued jobs."""
+    await job_executor.stop()
+
+
+async def startup_loop_monitor() -> None:
+    """Start measuring event loop lag & detecting blocking calls."""
+    if params.watchdog.enabled:
+        await loop_monitor.start()
+
+
+async def shutdown_loop_monitor() -> None:
+    """Stop monitoring the event loop."""
+    await loop_monitor.stop()
+
+
+async def startup_memory() -> None:
+    """Start exporting memory usage, and tracing allocations if enabled."""
+    if params.memory.tracemalloc:
+        start_tracing(params.memory.tracemalloc_frames)
+    await memory_monitor.start()
+
+
+async def shutdown_memory() -> None:
+    """Stop exporting memory usage & tracing allocations."""
+    await memory_monitor.stop()
+    if params.memory.tracemalloc:
+        stop_tracing()
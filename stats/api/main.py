@@ -1,17 +1,67 @@
 """API Routes & Configuration."""
 
+# Standard Library
+import math
+import asyncio
+from typing import Optional
+
 # Third Party
-from fastapi import FastAPI
-from starlette.responses import JSONResponse
+from fastapi import Query, Header, FastAPI
+from prometheus_client import CONTENT_TYPE_LATEST
+from starlette.requests import Request
+from starlette.responses import Response, JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 # Project
 from stats.log import log
 from stats.util import parse_port_id
 from stats.config import params
-from stats.api.events import startup_authdb, shutdown_authdb
-from stats.api.policy import job_status, update_acls, update_policy
-from stats.exceptions import AuthError, StatsError
+from stats.memory import track
+from stats.metrics import render_metrics
+from stats.tracing import TracedRoute, FileExporter, TracingMiddleware, span
+from stats.api.cache import CachePolicy, ResponseCache
+from stats.api.debug import memory, profile, queries
+from stats.api.events import (
+    startup_authdb,
+    startup_memory,
+    shutdown_authdb,
+    shutdown_memory,
+    startup_auth_index,
+    shutdown_auth_index,
+    startup_job_executor,
+    startup_loop_monitor,
+    shutdown_job_executor,
+    shutdown_loop_monitor,
+    startup_job_retention,
+    shutdown_job_retention,
+    shutdown_policy_server,
+)
+from stats.api.policy import (
+    jobs,
+    job_events,
+    job_status,
+    update_acls,
+    create_token,
+    update_policy,
+)
+from stats.exceptions import AuthError, StatsError, RequestError
+from stats.models.debug import QueryReport, MemoryReport
+from stats.models.token import TokenResponse
+from stats.api.responses import (
+    ARROW_STREAM,
+    TimeEncoding,
+    ResponseFormat,
+    UtilizationResponse,
+    ArrowUtilizationResponse,
+    ColumnarUtilizationResponse,
+    negotiate_media_type,
+)
+from stats.api.middleware import (
+    MemoryMiddleware,
+    MetricsMiddleware,
+    CompressionMiddleware,
+)
+from stats.database.series import Series
 from stats.actions.utilization import (
     port_average_range,
     port_average_period,
@@ -21,7 +71,7 @@ from stats.actions.utilization import (
     overall_utilization_max_period,
     overall_utilization_average_period,
 )
-from stats.models.update_policy import UpdatePolicyResponse
+from stats.models.update_policy import JobListResponse, UpdatePolicyResponse
 from stats.models.port_utilization import PortUtilization
 from stats.models.overall_utilization import OverallUtilization
 
@@ -34,6 +84,10 @@ api = FastAPI(
     default_response_class=JSONResponse,
 )
 
+if params.tracing.enabled:
+    # Must be set before any routes are added.
+    api.router.route_class = TracedRoute
+
 
 @api.exception_handler(StatsError)
 async def handle_app_error(request, exc):
@@ -47,13 +101,60 @@ async def handle_auth_error(request, exc):
     return JSONResponse({"error": str(exc)}, exc.status_code)
 
 
+@api.exception_handler(RequestError)
+async def handle_request_error(request, exc):
+    """Handle custom RequestError Exception."""
+    return JSONResponse({"error": str(exc)}, exc.status_code)
+
+
 api.add_middleware(
     CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"],
 )
 
+response_cache = ResponseCache(
+    max_entries=params.api.response_cache_entries,
+    max_bytes=params.api.response_cache_bytes,
+)
+
+api.add_middleware(
+    CompressionMiddleware,
+    minimum_size=params.api.compression_min_size,
+    cache=response_cache,
+)
+
+if params.memory.tracemalloc:
+    api.add_middleware(MemoryMiddleware)
+
+if params.tracing.enabled:
+    api.add_middleware(
+        TracingMiddleware,
+        server_timing=params.tracing.server_timing,
+        exporter=(
+            FileExporter(params.tracing.export_path)
+            if params.tracing.export_path is not None
+            else None
+        ),
+    )
+
+if params.metrics.enabled:
+    # Added last, so the latency includes all other middleware.
+    api.add_middleware(MetricsMiddleware)
+
 api.add_event_handler("startup", startup_authdb)
+api.add_event_handler("startup", startup_auth_index)
+api.add_event_handler("startup", startup_job_retention)
+api.add_event_handler("startup", startup_job_executor)
+api.add_event_handler("shutdown", shutdown_job_executor)
+api.add_event_handler("shutdown", shutdown_job_retention)
+api.add_event_handler("shutdown", shutdown_policy_server)
+api.add_event_handler("shutdown", shutdown_auth_index)
 api.add_event_handler("shutdown", shutdown_authdb)
 
+api.add_event_handler("startup", startup_memory)
+api.add_event_handler("shutdown", shutdown_memory)
+api.add_event_handler("startup", startup_loop_monitor)
+api.add_event_handler("shutdown", shutdown_loop_monitor)
+
 ASGI_PARAMS = {
     "host": str(params.listen_address),
     "port": params.listen_port,
@@ -61,10 +162,66 @@ ASGI_PARAMS = {
 }
 
 
+FORMAT_QUERY = Query(
+    ResponseFormat.json,
+    alias="format",
+    description=(
+        "Response format. `columnar` returns a single `time` array shared by "
+        "parallel `ingress` & `egress` value arrays."
+    ),
+)
+TIME_ENCODING_QUERY = Query(
+    TimeEncoding.array,
+    description=(
+        "Timestamp encoding for `columnar` responses: every timestamp, the "
+        "first timestamp plus deltas, or the first timestamp plus a fixed step."
+    ),
+)
+
+
+def _newest(*series: Series) -> Optional[int]:
+    """Get the newest timestamp of several series."""
+    return max((each.time[-1].item() for each in series if len(each)), default=None)
+
+
+def _utilization_response(
+    content: dict,
+    response_format: ResponseFormat,
+    time_encoding: TimeEncoding,
+    accept: Optional[str],
+):
+    """Encode utilization data in the requested format."""
+    with span("serialize", format=response_format.value):
+        if negotiate_media_type(accept) == ARROW_STREAM:
+            # Arrow responses are encoded while they're streamed, after the
+            # serialize stage, so their allocations aren't tracked with it.
+            return ArrowUtilizationResponse(content)
+        with track("serialize"):
+            if response_format == ResponseFormat.columnar:
+                return ColumnarUtilizationResponse(content, time_encoding=time_encoding)
+            return UtilizationResponse(content)
+
+
 async def port_utilization(
-    port_id: str, period: int = None, start: str = None, end: str = None,
+    request: Request,
+    port_id: str,
+    period: int = None,
+    start: str = None,
+    end: str = None,
+    response_format: ResponseFormat = FORMAT_QUERY,
+    time_encoding: TimeEncoding = TIME_ENCODING_QUERY,
+    accept: Optional[str] = Header(None),
 ):
     """Get utilization statistics for a port."""
+    cache = CachePolicy(request, start=start, end=end)
+    not_modified = cache.not_modified()
+    if not_modified is not None:
+        return not_modified
+
+    cached = response_cache.get(cache.etag)
+    if cached is not None:
+        return cache.apply(cached.response())
+
     if start is not None:
         data_in = await port_utilization_range(
             port_id=port_id,
@@ -124,22 +281,43 @@ async def port_utilization(
     location, participant_id, _ = parse_port_id(port_id)
 
     response = {
-        "ingress": data_in.get("values", [[]]),
-        "egress": data_out.get("values", [[]]),
+        "ingress": data_in,
+        "egress": data_out,
         "participant_id": participant_id,
         "location": location,
         "port_id": port_id,
-        "ingress_average": avg_in.get("values", [["", 0]])[0][1],
-        "egress_average": avg_out.get("values", [["", 0]])[0][1],
+        "ingress_average": math.ceil(avg_in.first(default=0)),
+        "egress_average": math.ceil(avg_out.first(default=0)),
     }
 
     log.debug("Response for query: {}", response)
 
-    return response
+    return response_cache.put(
+        cache,
+        cache.apply(
+            _utilization_response(response, response_format, time_encoding, accept),
+            last_modified=_newest(data_in, data_out),
+        ),
+    )
 
 
-async def overall_utilization(period: int = None):
+async def overall_utilization(
+    request: Request,
+    period: int = None,
+    response_format: ResponseFormat = FORMAT_QUERY,
+    time_encoding: TimeEncoding = TIME_ENCODING_QUERY,
+    accept: Optional[str] = Header(None),
+):
     """Get IX-Wide utilization statistics."""
+    cache = CachePolicy(request)
+    not_modified = cache.not_modified()
+    if not_modified is not None:
+        return not_modified
+
+    cached = response_cache.get(cache.etag)
+    if cached is not None:
+        return cache.apply(cached.response())
+
     period = period or params.api.default_period
     data_in = await overall_utilization_period(
         direction="in", period=period, limit=params.api.default_limit
@@ -157,14 +335,22 @@ async def overall_utilization(period: int = None):
         direction="in", period=period, limit=params.api.default_limit
     )
 
-    return {
-        "ingress": data_in.get("values", [[]]),
-        "egress": data_out.get("values", [[]]),
-        "ingress_average": avg_in.get("values", [["", 0]])[0][1],
-        "egress_average": avg_out.get("values", [["", 0]])[0][1],
-        "ingress_peak": peak_in.get("values", [["", 0]])[0][1],
+    response = {
+        "ingress": data_in,
+        "egress": data_out,
+        "ingress_average": math.ceil(avg_in.first(default=0)),
+        "egress_average": math.ceil(avg_out.first(default=0)),
+        "ingress_peak": math.ceil(peak_in.first(default=0)),
     }
 
+    return response_cache.put(
+        cache,
+        cache.apply(
+            _utilization_response(response, response_format, time_encoding, accept),
+            last_modified=_newest(data_in, data_out),
+        ),
+    )
+
 
 api.add_api_route(
     path="/utilization/all",
@@ -196,6 +382,14 @@ api.add_api_route(
     status_code=201,
 )
 
+api.add_api_route(
+    path="/auth/token",
+    endpoint=create_token,
+    response_model=TokenResponse,
+    methods=["POST"],
+    status_code=201,
+)
+
 api.add_api_route(
     path="/job/{job_id}",
     endpoint=job_status,
@@ -204,6 +398,61 @@ api.add_api_route(
     status_code=200,
 )
 
+api.add_api_route(
+    path="/jobs",
+    endpoint=jobs,
+    response_model=JobListResponse,
+    methods=["GET"],
+    status_code=200,
+)
+
+api.add_api_route(
+    path="/jobs/events", endpoint=job_events, methods=["GET"], status_code=200,
+)
+
+api.add_api_route(
+    path="/debug/queries",
+    endpoint=queries,
+    response_model=QueryReport,
+    methods=["GET"],
+    status_code=200,
+)
+
+api.add_api_route(
+    path="/debug/memory",
+    endpoint=memory,
+    response_model=MemoryReport,
+    methods=["GET"],
+    status_code=200,
+)
+
+if params.profiling.enabled:
+    api.add_api_route(
+        path="/debug/profile",
+        endpoint=profile,
+        methods=["GET"],
+        status_code=200,
+        include_in_schema=False,
+    )
+
+
+async def metrics():
+    """Get Prometheus metrics."""
+    # Aggregating multi-process metrics reads every worker's metric files.
+    loop = asyncio.get_running_loop()
+    content = await loop.run_in_executor(None, render_metrics)
+    return Response(content, headers={"content-type": CONTENT_TYPE_LATEST})
+
+
+if params.metrics.enabled:
+    api.add_api_route(
+        path="/metrics",
+        endpoint=metrics,
+        methods=["GET"],
+        status_code=200,
+        include_in_schema=False,
+    )
+
 
 def start(**kwargs):
     """Start the web server with Uvicorn ASGI."""
@@ -0,0 +1,226 @@
+"""Custom ASGI Middleware."""
+
+# Standard Library
+import gzip
+import time
+import tracemalloc
+from typing import Dict, Callable, Optional
+
+# Third Party
+from starlette.types import Send, Scope, ASGIApp, Message, Receive
+from starlette.datastructures import Headers, MutableHeaders
+
+# Project
+from stats.memory import TrackedBlock, track
+from stats.metrics import REQUEST_LATENCY, REQUESTS_IN_FLIGHT
+from stats.tracing import span
+from stats.api.cache import ResponseCache
+
+try:
+    # Third Party
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json", "text/")
+
+STREAMING_TYPES = ("text/event-stream",)
+
+
+def _gzip(body: bytes) -> bytes:
+    return gzip.compress(body, compresslevel=6)
+
+
+def _brotli(body: bytes) -> bytes:
+    return brotli.compress(body, quality=5)
+
+
+ENCODERS: Dict[str, Callable[[bytes], bytes]] = {"gzip": _gzip}
+
+if brotli is not None:
+    ENCODERS = {"br": _brotli, **ENCODERS}
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Select the preferred supported encoding from an Accept-Encoding header."""
+    accepted = {}
+
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+
+    candidates = [
+        (accepted.get(coding, accepted.get("*", 0.0)), coding) for coding in ENCODERS
+    ]
+    quality, coding = max(candidates, key=lambda c: c[0])
+
+    if quality <= 0:
+        return None
+    return coding
+
+
+def _streaming(start: Message) -> bool:
+    """Determine if a response is streamed, from its start message."""
+    headers = Headers(raw=start["headers"])
+    return "content-length" not in headers or headers.get(
+        "content-type", ""
+    ).startswith(STREAMING_TYPES)
+
+
+class CompressionMiddleware:
+    """Compress complete response bodies with gzip or brotli.
+
+    Only responses at least `minimum_size` bytes long with a compressible
+    content type are compressed. Streaming responses, which have no
+    content-length or are event streams, are passed through as soon as
+    they start.
+    If a response's ETag is present in `cache`, the compressed body is
+    stored with the cached response and reused by subsequent requests.
+    """
+
+    def __init__(
+        self, app: ASGIApp, minimum_size: int = 1024, cache: ResponseCache = None
+    ) -> None:
+        """Initialize CompressionMiddleware()."""
+        self.app = app
+        self.minimum_size = minimum_size
+        self.cache = cache
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Compress the response if the client supports it."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = Headers(scope=scope).get("accept-encoding", "")
+        encoding = negotiate_encoding(accept_encoding) if accept_encoding else None
+
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Optional[Message] = None
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start_message
+
+            if message["type"] == "http.response.start":
+                if _streaming(message):
+                    await send(message)
+                else:
+                    start_message = message
+                return
+
+            if start_message is None:
+                await send(message)
+                return
+
+            start, start_message = start_message, None
+
+            if message.get("more_body", False):
+                # Streaming response, pass through as-is.
+                await send(start)
+                await send(message)
+                return
+
+            body = self._compress(start, message.get("body", b""), encoding)
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
+
+    def _compress(self, start: Message, body: bytes, encoding: str) -> bytes:
+        """Compress a complete body, updating the response start headers."""
+        headers = MutableHeaders(raw=start["headers"])
+        content_type = headers.get("content-type", "")
+
+        if (
+            start["status"] != 200
+            or len(body) < self.minimum_size
+            or "content-encoding" in headers
+            or not content_type.startswith(COMPRESSIBLE_TYPES)
+        ):
+            return body
+
+        encoder = ENCODERS[encoding]
+        etag = headers.get("etag")
+
+        with span("compress", encoding=encoding), track("compress"):
+            if self.cache is not None and etag is not None:
+                compressed = self.cache.encoded(etag, body, encoding, encoder)
+            else:
+                compressed = encoder(body)
+
+        headers["content-encoding"] = encoding
+        headers["content-length"] = str(len(compressed))
+        headers.add_vary_header("Accept-Encoding")
+        return compressed
+
+
+class MetricsMiddleware:
+    """Record the latency of each request & the number of requests in flight.
+
+    Latency is labeled by the name of the endpoint that handled the
+    request, rather than its path, so path parameters such as port IDs
+    don't create a time series per value.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        """Initialize MetricsMiddleware()."""
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Time the request."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            # The router adds the matched endpoint to the scope.
+            endpoint = getattr(scope.get("endpoint"), "__name__", "unmatched")
+            REQUEST_LATENCY.labels(scope["method"], endpoint, status).observe(
+                time.perf_counter() - start
+            )
+
+
+class MemoryMiddleware:
+    """Record the peak memory allocated while handling each request.
+
+    Only recorded while allocations are traced with `tracemalloc`.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        """Initialize MemoryMiddleware()."""
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Track the request's allocations."""
+        if scope["type"] != "http" or not tracemalloc.is_tracing():
+            await self.app(scope, receive, send)
+            return
+
+        # Named once the router has matched the endpoint.
+        with TrackedBlock(None, request=True) as block:
+            await self.app(scope, receive, send)
+            endpoint = scope.get("endpoint")
+            if endpoint is not None:
+                block.name = endpoint.__name__
@@ -1,29 +1,82 @@
 """API Endpoints for Routing Policy Control."""
 
 # Standard Library
-from typing import Optional
+from typing import Any, Dict, List, Optional, AsyncIterator
+from datetime import datetime
 
 # Third Party
-from fastapi import Header, BackgroundTasks
+from fastapi import Query, Header
+from starlette.responses import StreamingResponse
 
 # Project
 from stats.log import log
-from stats.auth.main import get_job, create_job, authorize_route, authenticate_user
-from stats.exceptions import AuthError
-from stats.actions.policy import _update_policy, _update_switch_acl
-from stats.models.update_policy import UpdatePolicyResponse
+from stats.config import params
+from stats.tracing import span
+from stats.auth.main import (
+    get_job,
+    get_jobs,
+    list_jobs,
+    wait_for_job,
+    latest_job_id,
+    get_jobs_after,
+    authorize_route,
+    get_user_routes,
+    authenticate_user,
+)
+from stats.auth.queue import create_queued_job
+from stats.auth.token import issue_token, verify_token
+from stats.exceptions import AuthError, RequestError
+from stats.auth.notify import job_notifier
+from stats.models.token import TokenResponse
+from stats.models.update_policy import JobStatus, JobListResponse, UpdatePolicyResponse
 
+# Maximum number of jobs returned by a single job list or lookup request.
+MAX_JOBS = 500
 
-async def _verify_auth(username: str, password: str, route: str) -> bool:
-    """Authenticate & authorize a user.
 
-    Verifies the proper headers are provided, authenticates the username
-    & password, and authorizes the route.
+async def _verify_token(authorization: str, route: str) -> str:
+    """Authorize a route for a bearer token's user, without verifying a password."""
+    scheme, _, token = authorization.partition(" ")
+
+    if scheme.lower() != "bearer" or not token:
+        raise AuthError("Unsupported authorization scheme '{s}'", s=scheme)
+
+    claims = verify_token(token.strip())
+
+    try:
+        authorized = await authorize_route(claims.username, route)
+    except AuthError:
+        # The user was deleted after the token was issued.
+        authorized = False
+
+    if not authorized:
+        raise AuthError(
+            "Authentication or authorization failed for user '{user}'",
+            user=claims.username,
+            status_code=401,
+        )
+
+    return claims.username
+
+
+async def _verify_auth(
+    username: str, password: str, route: str, authorization: Optional[str] = None
+) -> str:
+    """Authenticate & authorize a user, returning the authenticated username.
+
+    If a bearer token is provided, its signature & expiry are verified, and
+    the route is authorized for its user. Otherwise, verifies the proper
+    headers are provided, authenticates the username & password, and
+    authorizes the route.
     """
-    has_headers = all((username, password))
-    authenticated = await authenticate_user(username=username, password=password)
-    authorized = await authorize_route(username, route)
-    full_auth = all((has_headers, authenticated, authorized))
+    with span("auth"):
+        if authorization is not None:
+            return await _verify_token(authorization, route)
+
+        has_headers = all((username, password))
+        authenticated = await authenticate_user(username=username, password=password)
+        authorized = await authorize_route(username, route)
+        full_auth = all((has_headers, authenticated, authorized))
 
     if not full_auth:
         raise AuthError(
@@ -32,20 +85,26 @@ async def _verify_auth(username: str, password: str, route: str) -> bool:
             status_code=401,
         )
 
-    return full_auth
+    return username
 
 
 async def update_policy(
-    background_tasks: BackgroundTasks,
     x_48ix_api_user: Optional[str] = Header(None),
     x_48ix_api_key: Optional[str] = Header(None),
+    authorization: Optional[str] = Header(None),
 ):
     """Initiate a manual policy update."""
-    await _verify_auth(x_48ix_api_user, x_48ix_api_key, "/policy/update/")
+    username = await _verify_auth(
+        x_48ix_api_user, x_48ix_api_key, "/policy/update/", authorization
+    )
 
-    job = await create_job(requestor=x_48ix_api_user)
+    job = await create_queued_job(
+        requestor=username,
+        action="update_policy",
+        args={"wait": 1},
+        delay=params.policy_server.coalesce_window,
+    )
     await job.fetch_related("requestor")
-    background_tasks.add_task(_update_policy, wait=1, job=job.id)
     job_response = UpdatePolicyResponse(
         id=job.id,
         request_time=job.request_time,
@@ -58,19 +117,23 @@ async def update_policy(
 
 
 async def update_acls(
-    background_tasks: BackgroundTasks,
     x_48ix_api_user: Optional[str] = Header(None),
     x_48ix_api_key: Optional[str] = Header(None),
+    authorization: Optional[str] = Header(None),
 ):
     """Initiate a manual policy update."""
 
-    await _verify_auth(x_48ix_api_user, x_48ix_api_key, "/acls/update/")
+    username = await _verify_auth(
+        x_48ix_api_user, x_48ix_api_key, "/acls/update/", authorization
+    )
 
-    job = await create_job(requestor=x_48ix_api_user)
+    job = await create_queued_job(
+        requestor=username,
+        action="update_acls",
+        delay=params.policy_server.coalesce_window,
+    )
     await job.fetch_related("requestor")
 
-    background_tasks.add_task(_update_switch_acl, job=job.id)
-
     job_response = UpdatePolicyResponse(
         id=job.id,
         request_time=job.request_time,
@@ -84,12 +147,21 @@ async def update_acls(
 
 async def job_status(
     job_id: int,
+    wait: float = Query(0, ge=0, le=params.jobs.max_wait),
     x_48ix_api_user: Optional[str] = Header(None),
     x_48ix_api_key: Optional[str] = Header(None),
+    authorization: Optional[str] = Header(None),
 ):
-    """Get the status of a job by ID."""
-    await _verify_auth(x_48ix_api_user, x_48ix_api_key, "/job/*")
-    job = await get_job(job_id)
+    """Get the status of a job by ID.
+
+    If `wait` is set, the response is delayed until the job completes, or
+    until `wait` seconds elapse, whichever happens first.
+    """
+    await _verify_auth(x_48ix_api_user, x_48ix_api_key, f"/job/{job_id}", authorization)
+    if wait:
+        job = await wait_for_job(job_id, wait)
+    else:
+        job = await get_job(job_id)
     await job.fetch_related("requestor")
 
     response = UpdatePolicyResponse(
@@ -102,3 +174,123 @@ async def job_status(
     )
     log.debug("Job {} status: {}", job.id, response)
     return response.dict()
+
+
+async def jobs(
+    requestor: Optional[str] = None,
+    status: Optional[JobStatus] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=MAX_JOBS),
+    ids: Optional[List[int]] = Query(None, alias="id"),
+    x_48ix_api_user: Optional[str] = Header(None),
+    x_48ix_api_key: Optional[str] = Header(None),
+    authorization: Optional[str] = Header(None),
+):
+    """List jobs, newest first, or get the status of specific jobs by ID.
+
+    Pass the returned `next_cursor` as `cursor` to get the next page. If one
+    or more `id` parameters are provided, only those jobs are returned.
+    """
+    await _verify_auth(x_48ix_api_user, x_48ix_api_key, "/jobs", authorization)
+
+    if ids:
+        if len(ids) > MAX_JOBS:
+            raise RequestError(
+                "A maximum of {n} jobs may be requested at once", n=MAX_JOBS
+            )
+        return JobListResponse(jobs=await get_jobs(ids), next_cursor=None).dict()
+
+    in_progress = None
+    if status is not None:
+        in_progress = status == JobStatus.in_progress
+
+    results, next_cursor = await list_jobs(
+        requestor=requestor, in_progress=in_progress, cursor=cursor, limit=limit
+    )
+    return JobListResponse(jobs=results, next_cursor=next_cursor).dict()
+
+
+def _job_event(job: Dict[str, Any]) -> str:
+    """Format a job as a server-sent event."""
+    data = UpdatePolicyResponse(**job).json()
+    return f"id: {job['id']}\nevent: job\ndata: {data}\n\n"
+
+
+async def _job_events(requestor: Optional[str]) -> AsyncIterator[str]:
+    """Generate server-sent events for jobs created or changed after connecting.
+
+    In-progress jobs are tracked until they complete. When a job changes,
+    only the tracked jobs & any newly created jobs are read.
+    """
+    change = job_notifier.listen()
+    last_id = await latest_job_id()
+    running, _ = await list_jobs(requestor=requestor, in_progress=True, limit=MAX_JOBS)
+    tracked = {job["id"]: (job["in_progress"], job["detail"]) for job in running}
+
+    while True:
+        if not await change.wait(params.jobs.events_keepalive):
+            yield ": keepalive\n\n"
+            continue
+
+        job_ids, change = change.job_ids, change.next
+
+        if job_ids is not None and all(
+            job_id <= last_id and job_id not in tracked for job_id in job_ids
+        ):
+            continue
+
+        changed = await get_jobs(list(tracked)) if tracked else []
+        changed += await get_jobs_after(last_id, requestor=requestor)
+
+        for job in changed:
+            state = (job["in_progress"], job["detail"])
+            last_id = max(last_id, job["id"])
+
+            if tracked.get(job["id"]) == state:
+                continue
+
+            if job["in_progress"]:
+                tracked[job["id"]] = state
+            else:
+                tracked.pop(job["id"], None)
+
+            yield _job_event(job)
+
+
+async def job_events(
+    requestor: Optional[str] = None,
+    x_48ix_api_user: Optional[str] = Header(None),
+    x_48ix_api_key: Optional[str] = Header(None),
+    authorization: Optional[str] = Header(None),
+):
+    """Stream job state changes as server-sent events."""
+    await _verify_auth(x_48ix_api_user, x_48ix_api_key, "/jobs", authorization)
+    return StreamingResponse(
+        _job_events(requestor),
+        media_type="text/event-stream",
+        headers={"cache-control": "no-cache"},
+    )
+
+
+async def create_token(
+    x_48ix_api_user: Optional[str] = Header(None),
+    x_48ix_api_key: Optional[str] = Header(None),
+):
+    """Exchange API credentials for a signed, expiring bearer token."""
+    authenticated = all((x_48ix_api_user, x_48ix_api_key)) and await authenticate_user(
+        username=x_48ix_api_user, password=x_48ix_api_key
+    )
+
+    if not authenticated:
+        raise AuthError(
+            "Authentication failed for user '{user}'",
+            user=x_48ix_api_user,
+            status_code=401,
+        )
+
+    routes = await get_user_routes(x_48ix_api_user)
+    token, expires = issue_token(x_48ix_api_user)
+    response = TokenResponse(
+        token=token, expires=datetime.utcfromtimestamp(expires), routes=routes
+    )
+    return response.dict()
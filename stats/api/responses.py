@@ -0,0 +1,248 @@
+"""Custom API Responses."""
+
+# Standard Library
+import json
+from enum import Enum
+from typing import Any, Dict, Tuple, Union, Iterator, Optional
+from importlib.util import find_spec
+
+# Third Party
+import numpy as np
+from starlette.responses import JSONResponse, StreamingResponse
+
+# Project
+from stats.exceptions import StatsError, RequestError
+from stats.database.series import Series, align
+
+JSON = "application/json"
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+
+# pyarrow is slow to import, so it's only imported to build a response.
+ARROW_AVAILABLE = find_spec("pyarrow") is not None
+
+MEDIA_TYPES: Tuple[str, ...] = (JSON, ARROW_STREAM) if ARROW_AVAILABLE else (JSON,)
+
+
+class ResponseFormat(str, Enum):
+    """Supported utilization response formats."""
+
+    json = "json"
+    columnar = "columnar"
+
+
+class TimeEncoding(str, Enum):
+    """Supported timestamp encodings for columnar responses."""
+
+    array = "array"
+    delta = "delta"
+    step = "step"
+
+
+def _media_quality(accepted: Dict[str, float], media_type: str) -> Tuple[float, int]:
+    """Get a media type's quality from its most specific accepted media range."""
+    ranges = (media_type, media_type.split("/")[0] + "/*", "*/*")
+    for specificity, media_range in zip((2, 1, 0), ranges):
+        if media_range in accepted:
+            return accepted[media_range], specificity
+    return 0.0, -1
+
+
+def negotiate_media_type(accept: Optional[str]) -> str:
+    """Select the preferred supported media type from an Accept header.
+
+    Media types named explicitly are preferred over those matched by a
+    wildcard at the same quality. JSON is used if the header is missing, or
+    accepts no supported type, unless it only accepts Arrow, which isn't
+    supported without pyarrow installed.
+    """
+    if not accept:
+        return JSON
+
+    accepted = {}
+
+    for item in accept.split(","):
+        media_range, *params = (part.strip() for part in item.split(";"))
+        quality = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        accepted[media_range.lower()] = quality
+
+    candidates = [
+        (_media_quality(accepted, media_type), media_type) for media_type in MEDIA_TYPES
+    ]
+    (quality, _), media_type = max(candidates, key=lambda c: c[0])
+
+    if quality > 0:
+        return media_type
+
+    if _media_quality(accepted, ARROW_STREAM)[0] > 0:
+        raise RequestError(
+            "Arrow output requires the 'pyarrow' package to be installed.",
+            status_code=406,
+        )
+
+    return JSON
+
+
+def _materialize(value: Any) -> Any:
+    """Convert internal data structures to JSON-compatible objects."""
+    if isinstance(value, Series):
+        return value.ceil().pairs() or [[]]
+    return value
+
+
+def encode_time(time: np.ndarray, encoding: TimeEncoding) -> Union[list, dict]:
+    """Encode an epoch timestamp array.
+
+    `array` returns every timestamp, `delta` returns the first timestamp &
+    the difference between each subsequent timestamp, and `step` returns the
+    first timestamp, the interval & the number of timestamps. If timestamps
+    aren't evenly spaced, `step` falls back to `delta`.
+    """
+    if encoding == TimeEncoding.array or len(time) == 0:
+        return time.tolist()
+
+    deltas = np.diff(time)
+
+    if encoding == TimeEncoding.step and (deltas == deltas[:1]).all():
+        step = deltas[0].item() if len(deltas) else 0
+        return {"start": time[0].item(), "step": step, "count": len(time)}
+
+    return {"start": time[0].item(), "delta": deltas.tolist()}
+
+
+class UtilizationResponse(JSONResponse):
+    """JSON response for utilization data that has already been validated.
+
+    Returning a response instance from an endpoint causes FastAPI to skip
+    `response_model` validation, so the series data is encoded exactly once,
+    while the model is still used to publish the OpenAPI schema.
+    """
+
+    def render(self, content: Any) -> bytes:
+        """Encode series data directly to JSON."""
+        content = {key: _materialize(value) for key, value in content.items()}
+        return json.dumps(
+            content,
+            ensure_ascii=False,
+            allow_nan=False,
+            indent=None,
+            separators=(",", ":"),
+        ).encode("utf-8")
+
+
+class ColumnarUtilizationResponse(UtilizationResponse):
+    """Utilization response with a single, shared time axis.
+
+    Ingress & egress series are aligned on their timestamps and returned as
+    parallel value arrays, rather than repeating each timestamp per value.
+    """
+
+    def __init__(
+        self, content: Dict[str, Any], time_encoding: TimeEncoding, **kwargs
+    ) -> None:
+        """Set the time encoding before the content is rendered."""
+        self.time_encoding = time_encoding
+        super().__init__(content, **kwargs)
+
+    def render(self, content: Any) -> bytes:
+        """Align ingress & egress data, and encode it as columns."""
+        content = content.copy()
+        aligned = align(
+            content.pop("ingress"), content.pop("egress"), columns=("in", "out")
+        ).ceil()
+        columns = {
+            "time": encode_time(aligned.time, self.time_encoding),
+            "ingress": aligned.column(0).tolist(),
+            "egress": aligned.column(1).tolist(),
+        }
+        return super().render({**columns, **content})
+
+
+class _ChunkSink:
+    """Writable file-like object that buffers chunks until drained."""
+
+    closed = False
+
+    def __init__(self) -> None:
+        """Initialize _ChunkSink()."""
+        self.chunks = []
+
+    def write(self, data) -> int:
+        """Buffer a chunk."""
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        """Nothing to flush, chunks are drained explicitly."""
+
+    def close(self) -> None:
+        """Mark the sink as closed."""
+        self.closed = True
+
+    def drain(self) -> bytes:
+        """Get & clear all buffered chunks."""
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+class ArrowUtilizationResponse(StreamingResponse):
+    """Utilization response encoded as an Apache Arrow IPC stream.
+
+    Ingress & egress series are aligned on a shared `time` column and sent
+    as record batches of at most `batch_size` rows. Scalar fields, such as
+    averages & port metadata, are attached as schema metadata.
+    """
+
+    media_type = ARROW_STREAM
+
+    def __init__(
+        self, content: Dict[str, Any], batch_size: int = 65536, **kwargs
+    ) -> None:
+        """Build the Arrow table & stream its record batches."""
+        try:
+            # Third Party
+            import pyarrow as pa
+        except ImportError:
+            raise StatsError(
+                "Arrow output requires the 'pyarrow' package to be installed."
+            ) from None
+
+        content = content.copy()
+        aligned = align(
+            content.pop("ingress"), content.pop("egress"), columns=("in", "out")
+        )
+        table = pa.table(
+            {
+                "time": pa.array(aligned.time, type=pa.timestamp("s", tz="UTC")),
+                "ingress": self._bits(pa, aligned.column(0)),
+                "egress": self._bits(pa, aligned.column(1)),
+            },
+            metadata={key: str(value) for key, value in content.items()},
+        )
+        super().__init__(
+            self._stream(pa, table, batch_size), media_type=self.media_type, **kwargs
+        )
+
+    @staticmethod
+    def _bits(pa, values: np.ndarray):
+        """Round bit values up, converting NaN to Arrow nulls."""
+        return pa.array(np.ceil(values), from_pandas=True).cast(pa.int64())
+
+    @staticmethod
+    def _stream(pa, table, batch_size: int) -> Iterator[bytes]:
+        """Serialize a table as IPC stream chunks, one per record batch."""
+        sink = _ChunkSink()
+        writer = pa.ipc.new_stream(pa.PythonFile(sink, mode="w"), table.schema)
+
+        for batch in table.to_batches(max_chunksize=batch_size):
+            writer.write_batch(batch)
+            yield sink.drain()
+
+        writer.close()
+        yield sink.drain()
@@ -0,0 +1,122 @@
+"""Incrementally write job detail messages."""
+
+# Standard Library
+import asyncio
+from typing import List, Optional, Sequence
+
+# Third Party
+from tortoise import Tortoise
+
+# Project
+from stats.log import log
+from stats.auth.main import update_jobs
+from stats.auth.notify import job_notifier
+
+TRUNCATED = " ... (truncated)"
+
+
+async def append_job_detail(
+    job_ids: Sequence[int], text: str, separator: str = ", "
+) -> None:
+    """Append text to the detail of multiple jobs, without reading it first."""
+    placeholders = ", ".join("?" for _ in job_ids)
+    connection = Tortoise.get_connection("default")
+    await connection.execute_query(
+        'UPDATE "api_jobs" SET "detail" = CASE '
+        'WHEN "detail" IS NULL OR "detail" = \'\' THEN ? '
+        'ELSE "detail" || ? || ? END '
+        f'WHERE "id" IN ({placeholders})',
+        [text, separator, text, *job_ids],
+    )
+    job_notifier.notify(*job_ids)
+
+
+class JobDetailWriter:
+    """Buffer lines of output & append them to job details in batches.
+
+    Buffered lines are written once `flush_size` characters have been
+    buffered, and at least every `flush_interval` seconds, so progress is
+    visible without a database write per line. Once `max_length` characters
+    have been written, further output is discarded & the detail is marked
+    as truncated.
+
+    The first write replaces any existing detail, such as the error from a
+    previous attempt.
+    """
+
+    def __init__(
+        self,
+        job_ids: Sequence[int],
+        flush_interval: float,
+        flush_size: int,
+        max_length: int,
+        separator: str = ", ",
+    ) -> None:
+        """Initialize JobDetailWriter()."""
+        self.job_ids = list(job_ids)
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self.max_length = max_length
+        self.separator = separator
+        self.written = 0
+        self.truncated = False
+        self._buffer: List[str] = []
+        self._buffered = 0
+        self._lock = asyncio.Lock()
+        self._flusher: Optional[asyncio.Task] = None
+
+    async def __aenter__(self) -> "JobDetailWriter":
+        """Start flushing buffered lines periodically."""
+        self._flusher = asyncio.ensure_future(self._flush_periodically())
+        return self
+
+    async def __aexit__(self, exc_type, *args) -> None:
+        """Write any remaining buffered lines."""
+        if self._flusher is not None:
+            self._flusher.cancel()
+        await self.flush()
+
+        if exc_type is None and self.written == 0:
+            # No output, so clear any detail from a previous attempt.
+            await update_jobs(self.job_ids, detail="")
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as err:
+                log.error("Error writing job detail: {}", repr(err))
+
+    async def write(self, line: str) -> None:
+        """Buffer a line of output, writing the buffer if it's full."""
+        if self.truncated:
+            return
+
+        self._buffer.append(line)
+        self._buffered += len(line) + len(self.separator)
+
+        if self._buffered >= self.flush_size:
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Write all buffered lines."""
+        async with self._lock:
+            if not self._buffer:
+                return
+
+            text = self.separator.join(self._buffer)
+            self._buffer.clear()
+            self._buffered = 0
+
+            remaining = self.max_length - self.written
+            if len(text) > remaining:
+                text = text[:remaining] + TRUNCATED
+                self.truncated = True
+
+            if self.written == 0:
+                await update_jobs(self.job_ids, detail=text)
+            else:
+                await append_job_detail(self.job_ids, text, self.separator)
+
+            self.written += len(text)
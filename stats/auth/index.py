@@ -0,0 +1,116 @@
+"""In-memory index of API users & their authorized routes."""
+
+# Standard Library
+import re
+import fnmatch
+from typing import Dict, Tuple, Pattern, Iterable, Optional, FrozenSet, NamedTuple
+from functools import lru_cache
+
+# Third Party
+from tortoise import Tortoise
+
+# Project
+from stats.log import log
+from stats.auth.models import ApiUser
+
+
+class RouteSet:
+    """Set of route names, where names containing `*` match as wildcards."""
+
+    __slots__ = ("names", "patterns")
+
+    def __init__(self, names: FrozenSet[str]) -> None:
+        """Precompile wildcard route names."""
+        self.names = names
+        self.patterns: Tuple[Pattern, ...] = tuple(
+            re.compile(fnmatch.translate(name)) for name in names if "*" in name
+        )
+
+    def __contains__(self, route: str) -> bool:
+        """Determine if a route matches any route name."""
+        if route in self.names:
+            return True
+        return any(pattern.match(route) for pattern in self.patterns)
+
+    def __iter__(self):
+        """Iterate through route names."""
+        return iter(self.names)
+
+
+@lru_cache(maxsize=1024)
+def compile_routes(names: FrozenSet[str]) -> RouteSet:
+    """Get a (cached) RouteSet for a set of route names."""
+    return RouteSet(names)
+
+
+class UserEntry(NamedTuple):
+    """Indexed API user."""
+
+    username: str
+    password: str
+    routes: RouteSet
+
+
+class AuthIndex:
+    """In-memory copy of API users & their authorized routes.
+
+    Lookups never touch the database. The index is reloaded in full when
+    users or routes change, which is infrequent & cheap for the number of
+    API users & routes in use. Changes are detected by the auth version,
+    which is incremented by every change to users or routes, so changes to
+    other tables, like jobs, don't cause a reload.
+    """
+
+    def __init__(self) -> None:
+        """Initialize AuthIndex()."""
+        self.loaded = False
+        self.version: Optional[int] = None
+        self._users: Dict[str, UserEntry] = {}
+
+    def __len__(self) -> int:
+        """Get the number of indexed users."""
+        return len(self._users)
+
+    @staticmethod
+    def _build(users: Iterable[Tuple[str, str, Iterable[str]]]):
+        return {
+            username: UserEntry(
+                username=username,
+                password=password,
+                routes=compile_routes(frozenset(routes)),
+            )
+            for username, password, routes in users
+        }
+
+    @staticmethod
+    async def auth_version() -> int:
+        """Get the current auth version."""
+        connection = Tortoise.get_connection("default")
+        _, rows = await connection.execute_query(
+            'SELECT "version" FROM "api_auth_version" WHERE "id" = 1'
+        )
+        return rows[0][0] if rows else 0
+
+    async def load(self) -> None:
+        """Load all users & routes from the database."""
+        # Read first, so a change made during loading triggers another reload.
+        self.version = await self.auth_version()
+        users = await ApiUser.all().prefetch_related("routes")
+        self._users = self._build(
+            (user.username, user.password, [route.name for route in user.routes])
+            for user in users
+        )
+        self.loaded = True
+        log.debug("Loaded {} API users into authorization index", len(self._users))
+
+    async def refresh(self) -> None:
+        """Reload the index if users or routes have changed since it was loaded."""
+        if await self.auth_version() != self.version:
+            await self.load()
+
+    def get(self, username: str) -> Optional[UserEntry]:
+        """Get an indexed user."""
+        return self._users.get(username)
+
+
+auth_index = AuthIndex()
@@ -1,8 +1,18 @@
 """Interact with local SQLite database for API user authentication."""
 
 # Standard Library
-from typing import List, Union
+import hmac
+import time
+import base64
+import asyncio
+import hashlib
+import secrets
+from typing import Any, Dict, List, Tuple, Union, Optional, Sequence
+from pathlib import Path
 from datetime import datetime
+from itertools import cycle
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
 # Third Party
 from tortoise import Tortoise
@@ -12,18 +22,104 @@ from tortoise.exceptions import DoesNotExist, IntegrityError
 # Project
 from stats.log import log
 from stats.config import params
-from stats.exceptions import AuthError, StatsError
+from stats.metrics import ARGON2_LATENCY, CACHE_REQUESTS
+from stats.auth.index import UserEntry, auth_index, compile_routes
+from stats.auth.watch import DataVersionWatcher
+from stats.exceptions import AuthError, StatsError, RequestError
 from stats.auth.models import ApiJob, ApiUser, ApiRoute
+from stats.auth.notify import job_notifier
+from stats.auth.migrations import migrate
+
+# Argon2 is intentionally slow, so verification is run in a bounded thread
+# pool to avoid blocking the event loop.
+_verify_executor = ThreadPoolExecutor(
+    max_workers=params.auth.verify_threads, thread_name_prefix="argon2"
+)
+
+# Passlib loads hash backends lazily, which isn't thread-safe, so the
+# backend is loaded before any verification threads use it.
+argon2.get_backend()
+
+# Successfully verified credentials, keyed by an HMAC of the credentials &
+# the stored password hash, mapped to the time the entry expires. Changing a
+# user's password changes the stored hash, which invalidates the entry even
+# if it was changed by another process. Bounded to `auth.cache_entries`,
+# evicting the least recently used entries once expired ones are pruned.
+_verified: "OrderedDict[bytes, float]" = OrderedDict()
+_CREDENTIAL_HITS = CACHE_REQUESTS.labels("credentials", "hit")
+_CREDENTIAL_MISSES = CACHE_REQUESTS.labels("credentials", "miss")
+_verified_key = secrets.token_bytes(32)
+
+# Polls for database changes made by other processes, such as the CLI.
+db_watcher = DataVersionWatcher(interval=params.auth.index_refresh)
+
+
+# Round-robin iterator of read-only connection names.
+_read_connections = cycle(("default",))
+
+
+def _db_config(path: Path, **pragmas: Any) -> dict:
+    """Build the Tortoise ORM configuration for the API database.
+
+    The database is opened in WAL mode, so that reads on the read-only
+    connections aren't blocked by writes on the default connection, and
+    with a busy timeout, so that concurrent writers from other worker
+    processes wait for the write lock rather than failing immediately.
+    """
+    credentials = {
+        "file_path": str(path),
+        "journal_mode": "WAL",
+        "busy_timeout": params.api.dbmain_busy_timeout,
+        "synchronous": params.api.dbmain_synchronous,
+        "cache_size": params.api.dbmain_cache_size,
+        "foreign_keys": "ON",
+        **pragmas,
+    }
+    engine = "tortoise.backends.sqlite"
+    connections = {"default": {"engine": engine, "credentials": credentials}}
+
+    for index in range(params.api.dbmain_read_connections):
+        connections[f"read_{index}"] = {
+            "engine": engine,
+            "credentials": {**credentials, "query_only": "ON"},
+        }
+
+    return {
+        "connections": connections,
+        "apps": {
+            "models": {
+                "models": ["stats.auth.models"],
+                "default_connection": "default",
+            }
+        },
+    }
+
+
+def read_connection():
+    """Get the next read-only database connection from the pool."""
+    return Tortoise.get_connection(next(_read_connections))
+
+
+async def authdb_start(path: Optional[Path] = None, **pragmas: Any) -> None:
+    """Initialize database connections, migrating the schema if needed.
+
+    Keyword arguments override the default SQLite PRAGMAs.
+    """
+    global _read_connections
 
-
-async def authdb_start() -> None:
-    """Initialize database connection."""
     log.debug("Opening database connection")
-    await Tortoise.init(
-        db_url=f"sqlite:///{str(params.api.dbmain_path)}",
-        modules={"models": ["stats.auth.models"]},
-    )
-    await Tortoise.generate_schemas()
+    config = _db_config(path or params.api.dbmain_path, **pragmas)
+    await Tortoise.init(config=config)
+
+    readers = [name for name in config["connections"] if name != "default"]
+    _read_connections = cycle(readers or ("default",))
+
+    # Connections are opened lazily, and concurrent first queries on the
+    # same connection race to open it, so open them up front.
+    for name in readers:
+        await Tortoise.get_connection(name).execute_query("SELECT 1")
+
+    await migrate(Tortoise.get_connection("default"))
 
 
 async def authdb_stop() -> None:
@@ -32,6 +128,15 @@ async def authdb_stop() -> None:
     await Tortoise.close_connections()
 
 
+async def authdb_migrate(path: Optional[Path] = None) -> None:
+    """Apply pending schema migrations & close the database connection.
+
+    Intended to run once, before worker processes are started.
+    """
+    await authdb_start(path)
+    await authdb_stop()
+
+
 async def get_user(username: str) -> ApiUser:
     """Get a user object by username."""
     try:
@@ -45,13 +150,129 @@ async def get_user(username: str) -> ApiUser:
 
 async def get_job(job_id: int) -> ApiJob:
     """Get a job object by id."""
-    try:
-        job = await ApiJob.get(id=job_id)
-    except DoesNotExist as err:
-        raise StatsError(f"Job {job_id} does not exist.") from err
+    job = await ApiJob.filter(id=job_id).using_db(read_connection()).first()
+    if job is None:
+        raise StatsError(f"Job {job_id} does not exist.")
     return job
 
 
+async def wait_for_job(job_id: int, timeout: float) -> ApiJob:
+    """Get a job once it's complete, or once `timeout` seconds elapse.
+
+    Rather than polling, the job is only read again when this process
+    changes it, or when another process changes the database.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+
+    while True:
+        change = job_notifier.listen()
+        job = await get_job(job_id)
+
+        if not job.in_progress:
+            return job
+
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0 or not await change.wait(remaining):
+                return job
+            if change.affects(job_id):
+                break
+            change = change.next
+
+
+_JOB_FIELDS = ("id", "request_time", "complete_time", "in_progress", "detail")
+
+
+def _encode_cursor(job: Dict[str, Any]) -> str:
+    """Encode a job's position in the job list as an opaque cursor."""
+    position = f"{job['request_time'].isoformat()}|{job['id']}"
+    return base64.urlsafe_b64encode(position.encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a cursor to the position of the last job on the previous page."""
+    try:
+        request_time, job_id = base64.urlsafe_b64decode(cursor).decode().split("|")
+        return datetime.fromisoformat(request_time), int(job_id)
+    except ValueError:
+        raise RequestError("Invalid cursor '{c}'", c=cursor) from None
+
+
+async def list_jobs(
+    requestor: Optional[str] = None,
+    in_progress: Optional[bool] = None,
+    cursor: Optional[str] = None,
+    limit: int = 50,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Get a page of jobs, newest first, and the cursor for the next page.
+
+    Pages are selected by keyset pagination on `(request_time, id)`, so
+    each page is an index range scan regardless of how deep it is.
+    """
+    query = ApiJob.all().using_db(read_connection())
+
+    if requestor is not None:
+        query = query.filter(requestor__username=requestor)
+
+    if in_progress is not None:
+        query = query.filter(in_progress=in_progress)
+
+    if cursor is not None:
+        request_time, job_id = _decode_cursor(cursor)
+        # (request_time, id) < (cursor time, cursor id)
+        query = query.filter(request_time__lte=request_time).exclude(
+            request_time=request_time, id__gte=job_id
+        )
+
+    jobs = (
+        await query.order_by("-request_time", "-id")
+        .limit(limit + 1)
+        .values(*_JOB_FIELDS, requestor="requestor__username")
+    )
+
+    if len(jobs) > limit:
+        return jobs[:limit], _encode_cursor(jobs[limit - 1])
+
+    return jobs, None
+
+
+async def get_jobs(job_ids: Sequence[int]) -> List[Dict[str, Any]]:
+    """Get multiple jobs by ID in a single query."""
+    return (
+        await ApiJob.filter(id__in=job_ids)
+        .using_db(read_connection())
+        .order_by("id")
+        .values(*_JOB_FIELDS, requestor="requestor__username")
+    )
+
+
+async def latest_job_id() -> int:
+    """Get the ID of the most recently created job, or 0 if there are none."""
+    ids = (
+        await ApiJob.all()
+        .using_db(read_connection())
+        .order_by("-id")
+        .limit(1)
+        .values_list("id", flat=True)
+    )
+    return ids[0] if ids else 0
+
+
+async def get_jobs_after(
+    job_id: int, requestor: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """Get all jobs created after a job, oldest first."""
+    query = ApiJob.filter(id__gt=job_id).using_db(read_connection())
+
+    if requestor is not None:
+        query = query.filter(requestor__username=requestor)
+
+    return await query.order_by("id").values(
+        *_JOB_FIELDS, requestor="requestor__username"
+    )
+
+
 async def get_route(route: str) -> ApiRoute:
     """Get a user object by username."""
     try:
@@ -72,6 +293,7 @@ async def create_user(username: str, password: str) -> None:
             "User '{u}' already exists.", u=username, status_code=409
         ) from None
 
+    await _users_changed()
     log.success("Added user {}", username)
 
 
@@ -79,6 +301,7 @@ async def delete_user(username) -> None:
     """Delete an API user."""
     user = await get_user(username)
     await user.delete()
+    await _users_changed()
     log.success("Deleted user {}", username)
 
 
@@ -88,6 +311,7 @@ async def create_route(name: str) -> None:
         await ApiRoute.create(name=name)
     except IntegrityError:
         raise StatsError(f"Route '{name}' already exists") from None
+    await _users_changed()
     log.success("Added route {}", name)
 
 
@@ -95,6 +319,7 @@ async def delete_route(route) -> None:
     """Delete an API route."""
     _route = await get_route(route)
     await _route.delete()
+    await _users_changed()
     log.success("Deleted route {}", route)
 
 
@@ -103,19 +328,29 @@ async def create_job(requestor: str) -> ApiJob:
     user = await get_user(requestor)
     job = ApiJob(requestor=user, in_progress=True)
     await job.save()
+    job_notifier.notify(job.id)
     return job
 
 
+async def update_jobs(job_ids: Sequence[int], **kwargs) -> None:
+    """Update the attributes of multiple jobs."""
+    await ApiJob.filter(id__in=job_ids).update(**kwargs)
+    job_notifier.notify(*job_ids)
+
+
 async def update_job(job_id: int, **kwargs) -> None:
     """Update a job's attributes."""
-    await ApiJob.filter(id=job_id).update(**kwargs)
+    await update_jobs((job_id,), **kwargs)
+
+
+async def complete_jobs(job_ids: Sequence[int]) -> None:
+    """Mark multiple jobs as complete."""
+    await update_jobs(job_ids, in_progress=False, complete_time=datetime.utcnow())
 
 
 async def complete_job(job_id: int) -> None:
     """Mark a job as complete."""
-    await ApiJob.filter(id=job_id).update(
-        in_progress=False, complete_time=datetime.utcnow()
-    )
+    await complete_jobs((job_id,))
 
 
 async def _change_route(
@@ -141,6 +376,8 @@ async def _change_route(
         await coro(matched)
         log.success(msg, route, user.username)
 
+    await _users_changed()
+
 
 async def associate_route(username: str, routes: Union[str, List[str]]) -> None:
     """Add routes to a user."""
@@ -152,20 +389,47 @@ async def disassociate_route(username: str, routes: Union[str, List[str]]) -> No
     await _change_route(username, routes, "remove")
 
 
+async def get_user_routes(username: str) -> List[str]:
+    """Get the names of all routes a user is authorized to access."""
+    user = await get_user(username)
+    await user.fetch_related("routes")
+    return [route.name async for route in user.routes]
+
+
+async def _indexed_user(username: str) -> UserEntry:
+    """Get a user & its routes, from the in-memory index if it's loaded."""
+    if auth_index.loaded:
+        entry = auth_index.get(username)
+        if entry is None:
+            raise AuthError("User '{u}' does not exist.", u=username, status_code=404)
+        return entry
+
+    user = await get_user(username)
+    await user.fetch_related("routes")
+    routes = frozenset([route.name async for route in user.routes])
+    return UserEntry(
+        username=user.username, password=user.password, routes=compile_routes(routes)
+    )
+
+
+async def _users_changed() -> None:
+    """Invalidate cached authentication data after users or routes change.
+
+    The auth version is incremented, so other processes reload their index.
+    """
+    connection = Tortoise.get_connection("default")
+    await connection.execute_query(
+        'UPDATE "api_auth_version" SET "version" = "version" + 1 WHERE "id" = 1'
+    )
+    invalidate_credentials()
+    if auth_index.loaded:
+        await auth_index.load()
+
+
 async def authorize_route(username: str, route: str) -> bool:
     """Verify if a user has access to an API route."""
-    is_authorized = False
-    try:
-        user = await get_user(username)
-        await user.fetch_related("routes")
-        async for user_route in user.routes:
-            if route == user_route.name:
-                is_authorized = True
-                break
-    except DoesNotExist:
-        raise AuthError(
-            "User '{u}' does not exist.", u=username, status_code=401
-        ) from None
+    user = await _indexed_user(username)
+    is_authorized = route in user.routes
 
     if is_authorized:
         log.debug("{} is authorized to access {}", username, route)
@@ -175,10 +439,58 @@ async def authorize_route(username: str, route: str) -> bool:
     return is_authorized
 
 
+def _credential_key(username: str, password: str, password_hash: str) -> bytes:
+    """Create a keyed hash of a user's credentials."""
+    message = "\0".join((username, password, password_hash)).encode()
+    return hmac.new(_verified_key, message, hashlib.sha256).digest()
+
+
+def invalidate_credentials() -> None:
+    """Clear all cached credential verifications."""
+    _verified.clear()
+
+
+def _argon2_verify(password: str, password_hash: str) -> bool:
+    with ARGON2_LATENCY.time():
+        return argon2.verify(password, password_hash)
+
+
+async def verify_password(username: str, password: str, password_hash: str) -> bool:
+    """Verify a password against its hash without blocking the event loop.
+
+    Successful verifications are cached for `auth.cache_ttl` seconds, and
+    only the `auth.cache_entries` most recently used are kept.
+    """
+    key = _credential_key(username, password, password_hash)
+    now = time.monotonic()
+
+    if _verified.get(key, 0) > now:
+        _verified.move_to_end(key)
+        _CREDENTIAL_HITS.inc()
+        return True
+
+    _CREDENTIAL_MISSES.inc()
+    loop = asyncio.get_running_loop()
+    valid = await loop.run_in_executor(
+        _verify_executor, _argon2_verify, password, password_hash
+    )
+
+    if valid and params.auth.cache_ttl > 0 and params.auth.cache_entries > 0:
+        _verified.pop(key, None)
+        if len(_verified) >= params.auth.cache_entries:
+            for expired in [k for k, v in _verified.items() if v <= now]:
+                del _verified[expired]
+        while len(_verified) >= params.auth.cache_entries:
+            _verified.popitem(last=False)
+        _verified[key] = now + params.auth.cache_ttl
+
+    return valid
+
+
 async def authenticate_user(username: str, password: str) -> bool:
     """Authenticate a user."""
-    user = await get_user(username)
-    valid = argon2.verify(password, user.password)
+    user = await _indexed_user(username)
+    valid = await verify_password(username, password, user.password)
     if valid:
         log.debug("Authentication succeeded for user {}", username)
     if not valid:
@@ -0,0 +1,105 @@
+"""Versioned schema migrations for the API database.
+
+The schema version is stored in SQLite's `user_version` header field, so
+checking whether migrations are needed is a single PRAGMA query, and each
+migration only runs once per database rather than once per worker.
+"""
+
+# Standard Library
+from typing import Tuple, Callable, Awaitable
+
+# Third Party
+from tortoise import Tortoise
+from tortoise.backends.base.client import BaseDBAsyncClient
+
+# Project
+from stats.log import log
+
+Migration = Callable[[BaseDBAsyncClient], Awaitable[None]]
+
+
+async def _create_schema(connection: BaseDBAsyncClient) -> None:
+    """Create tables for all models."""
+    await Tortoise.generate_schemas(safe=True)
+
+
+_JOB_INDEXES = """
+CREATE INDEX IF NOT EXISTS "idx_api_jobs_time"
+    ON "api_jobs" ("request_time", "id");
+CREATE INDEX IF NOT EXISTS "idx_api_jobs_status_time"
+    ON "api_jobs" ("in_progress", "request_time", "id");
+CREATE INDEX IF NOT EXISTS "idx_api_jobs_requestor_time"
+    ON "api_jobs" ("requestor_id", "request_time", "id");
+"""
+
+
+async def _index_jobs(connection: BaseDBAsyncClient) -> None:
+    """Index jobs for listing by time, status, and requestor."""
+    await connection.execute_script(_JOB_INDEXES)
+
+
+async def _incremental_vacuum(connection: BaseDBAsyncClient) -> None:
+    """Enable incremental vacuum, so pages freed by job pruning can be reclaimed.
+
+    Changing `auto_vacuum` on an existing database only takes effect after
+    a full `VACUUM`, which is run once here.
+    """
+    await connection.execute_script("PRAGMA auto_vacuum = INCREMENTAL")
+    await connection.execute_script("VACUUM")
+
+
+_JOB_QUEUE_INDEXES = """
+CREATE INDEX IF NOT EXISTS "idx_api_job_queue_action_lease"
+    ON "api_job_queue" ("action", "lease_expires");
+CREATE INDEX IF NOT EXISTS "idx_api_job_queue_available"
+    ON "api_job_queue" ("available_at", "id");
+"""
+
+
+async def _create_job_queue(connection: BaseDBAsyncClient) -> None:
+    """Create the job queue table, and index it for leasing."""
+    await Tortoise.generate_schemas(safe=True)
+    await connection.execute_script(_JOB_QUEUE_INDEXES)
+
+
+_AUTH_VERSION = """
+CREATE TABLE IF NOT EXISTS "api_auth_version" (
+    "id" INTEGER PRIMARY KEY CHECK ("id" = 1),
+    "version" INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO "api_auth_version" ("id", "version") VALUES (1, 0);
+"""
+
+
+async def _create_auth_version(connection: BaseDBAsyncClient) -> None:
+    """Create the counter that's incremented when users or routes change."""
+    await connection.execute_script(_AUTH_VERSION)
+
+
+MIGRATIONS: Tuple[Migration, ...] = (
+    _create_schema,
+    _index_jobs,
+    _incremental_vacuum,
+    _create_job_queue,
+    _create_auth_version,
+)
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+async def schema_version(connection: BaseDBAsyncClient) -> int:
+    """Get the database's current schema version."""
+    _, rows = await connection.execute_query("PRAGMA user_version")
+    return rows[0][0]
+
+
+async def migrate(connection: BaseDBAsyncClient) -> int:
+    """Apply all pending migrations, returning the number applied."""
+    current = await schema_version(connection)
+
+    for version, migration in enumerate(MIGRATIONS[current:], start=current + 1):
+        log.info("Migrating database schema to version {}", version)
+        await migration(connection)
+        await connection.execute_script(f"PRAGMA user_version = {version}")
+
+    return max(SCHEMA_VERSION - current, 0)
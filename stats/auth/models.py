@@ -2,8 +2,12 @@
 
 # Third Party
 from tortoise.fields import (
+    CASCADE,
+    IntField,
     CharField,
+    JSONField,
     TextField,
+    FloatField,
     BooleanField,
     DatetimeField,
     ForeignKeyField,
@@ -55,3 +59,22 @@ class ApiJob(Model):
         """Tortoise ORM Config."""
 
         table = "api_jobs"
+
+
+class ApiJobQueue(Model):
+    """Queued API job action, leased by a job executor."""
+
+    job: ForeignKeyRelation[ApiJob] = ForeignKeyField(
+        "models.ApiJob", related_name="queue", on_delete=CASCADE
+    )
+    action = CharField(max_length=64)
+    args = JSONField(default=dict)
+    attempts = IntField(default=0)
+    available_at = FloatField()
+    lease_owner = CharField(max_length=128, null=True)
+    lease_expires = FloatField(null=True)
+
+    class Meta:
+        """Tortoise ORM Config."""
+
+        table = "api_job_queue"
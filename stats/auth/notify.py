@@ -0,0 +1,80 @@
+"""Broadcast API job changes to waiting requests."""
+
+# Standard Library
+import asyncio
+from typing import Optional, FrozenSet
+
+
+class JobChange:
+    """A single, future job change that any number of tasks can wait on."""
+
+    __slots__ = ("_event", "job_ids", "next")
+
+    def __init__(self) -> None:
+        """Initialize JobChange()."""
+        self._event = asyncio.Event()
+        self.job_ids: Optional[FrozenSet[int]] = None
+        self.next: Optional["JobChange"] = None
+
+    def set(self, job_ids: Optional[FrozenSet[int]], next_change: "JobChange") -> None:
+        """Record the changed jobs & their successor, and wake waiting tasks."""
+        self.job_ids = job_ids
+        self.next = next_change
+        self._event.set()
+
+    def affects(self, job_id: int) -> bool:
+        """Determine if the change may affect a job.
+
+        Changes made by other processes aren't attributed to a job, so
+        they may affect any job.
+        """
+        return self.job_ids is None or job_id in self.job_ids
+
+    async def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait for the change, returning `False` if `timeout` elapses first."""
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+
+class JobNotifier:
+    """Notify waiting tasks when jobs are created or updated.
+
+    Jobs changed by this process are signaled as soon as they're written.
+    Jobs changed by other processes are signaled when the database watcher
+    detects a change, by subscribing `notify_all` to it.
+
+    To avoid missing a change, call `listen()` *before* reading a job's
+    state, then wait on the returned change. Once a change is set, wait on
+    its `next` change rather than calling `listen()` again, as jobs may
+    have changed again in between.
+    """
+
+    def __init__(self) -> None:
+        """Initialize JobNotifier()."""
+        self._change: Optional[JobChange] = None
+
+    def listen(self) -> JobChange:
+        """Get the next change."""
+        if self._change is None:
+            self._change = JobChange()
+        return self._change
+
+    def notify(self, *job_ids: int) -> None:
+        """Signal that jobs have changed, or that any job may have changed."""
+        change = self._change
+        if change is not None:
+            self._change = JobChange()
+            change.set(frozenset(job_ids) or None, self._change)
+
+    async def notify_all(self) -> None:
+        """Signal that any job may have changed."""
+        self.notify()
+
+
+job_notifier = JobNotifier()
+
+# Signaled when job queue entries are added, finished, or released.
+queue_notifier = JobNotifier()
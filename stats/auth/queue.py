@@ -0,0 +1,141 @@
+"""Durable, SQLite-backed queue of API job actions.
+
+Each queued entry is attached to an `ApiJob`, and is leased by a job
+executor before it's run. A lease expires unless it's renewed, so entries
+leased by an executor that crashed or was restarted are run again.
+
+Leasing is a single `UPDATE` statement, so executors in any number of
+processes can safely compete for entries. Each lease takes every pending
+entry for a single action, so requests made close together are coalesced
+into one run, and an action is never leased while another lease on it is
+active. At most `slots` leases are active at once, across all processes.
+"""
+
+# Standard Library
+import time
+from typing import Any, Dict, List, Optional, Sequence, NamedTuple
+
+# Third Party
+from tortoise import Tortoise
+from tortoise.transactions import in_transaction
+
+# Project
+from stats.auth.main import get_user
+from stats.auth.models import ApiJob, ApiJobQueue
+from stats.auth.notify import job_notifier, queue_notifier
+
+_LEASE = """
+UPDATE "api_job_queue"
+SET "lease_owner" = ?, "lease_expires" = ?, "attempts" = "attempts" + 1
+WHERE "id" IN (
+    SELECT "entry"."id" FROM "api_job_queue" "entry"
+    WHERE "entry"."action" = (
+        SELECT "next"."action" FROM "api_job_queue" "next"
+        WHERE "next"."available_at" <= ?
+            AND ("next"."lease_expires" IS NULL OR "next"."lease_expires" < ?)
+            AND NOT EXISTS (
+                SELECT 1 FROM "api_job_queue" "active"
+                WHERE "active"."action" = "next"."action"
+                    AND "active"."lease_expires" >= ?
+            )
+        ORDER BY "next"."available_at", "next"."id"
+        LIMIT 1
+    )
+        AND "entry"."available_at" <= ?
+        AND ("entry"."lease_expires" IS NULL OR "entry"."lease_expires" < ?)
+    ORDER BY "entry"."id"
+    LIMIT ?
+)
+AND (
+    SELECT count(DISTINCT "lease_owner") FROM "api_job_queue"
+    WHERE "lease_expires" >= ?
+) < ?
+"""
+
+
+class QueueEntry(NamedTuple):
+    """Leased job queue entry."""
+
+    id: int
+    job_id: int
+    action: str
+    args: Dict[str, Any]
+    attempts: int
+
+
+async def create_queued_job(
+    requestor: str, action: str, args: Optional[Dict[str, Any]] = None, delay=0.0
+) -> ApiJob:
+    """Create a job & queue its action, to be run after `delay` seconds."""
+    user = await get_user(requestor)
+
+    async with in_transaction("default") as connection:
+        job = ApiJob(requestor=user, in_progress=True)
+        await job.save(using_db=connection)
+        await ApiJobQueue.create(
+            job=job,
+            action=action,
+            args=args or {},
+            available_at=time.time() + delay,
+            using_db=connection,
+        )
+
+    job_notifier.notify(job.id)
+    queue_notifier.notify(job.id)
+    return job
+
+
+async def lease_entries(
+    owner: str, ttl: float, slots: int, batch_size: int, horizon: float = 0.0
+) -> List[QueueEntry]:
+    """Lease the pending entries for the next available action.
+
+    Entries that become available within `horizon` seconds of the first
+    available entry are included in the lease.
+    """
+    now = time.time()
+    connection = Tortoise.get_connection("default")
+    leased, _ = await connection.execute_query(
+        _LEASE,
+        [owner, now + ttl, now, now, now, now + horizon, now, batch_size, now, slots],
+    )
+
+    if not leased:
+        return []
+
+    entries = (
+        await ApiJobQueue.filter(lease_owner=owner)
+        .order_by("id")
+        .values_list("id", "job_id", "action", "args", "attempts")
+    )
+    return [QueueEntry(*entry) for entry in entries]
+
+
+async def renew_lease(owner: str, ttl: float) -> None:
+    """Extend a lease that's still in use."""
+    await ApiJobQueue.filter(lease_owner=owner).update(lease_expires=time.time() + ttl)
+
+
+async def release_entries(entry_ids: Sequence[int], delay: float = 0.0) -> None:
+    """Release leased entries, to be leased again after `delay` seconds."""
+    await ApiJobQueue.filter(id__in=entry_ids).update(
+        lease_owner=None, lease_expires=None, available_at=time.time() + delay
+    )
+    queue_notifier.notify()
+
+
+async def finish_entries(entry_ids: Sequence[int]) -> None:
+    """Remove entries that have been run, or won't be retried, from the queue."""
+    await ApiJobQueue.filter(id__in=entry_ids).delete()
+    queue_notifier.notify()
+
+
+async def next_available() -> Optional[float]:
+    """Get the time the next unleased entry becomes available."""
+    connection = Tortoise.get_connection("default")
+    _, rows = await connection.execute_query(
+        'SELECT min("available_at") FROM "api_job_queue" '
+        'WHERE "lease_expires" IS NULL OR "lease_expires" < ?',
+        [time.time()],
+    )
+    return rows[0][0]
@@ -0,0 +1,167 @@
+"""Retention & compaction of completed API jobs.
+
+Completed jobs older than the retention period are appended to a JSON
+lines archive file, then deleted in small batches. Each batch is its own
+short write transaction, so API requests & other processes are never
+locked out of the database for long. Pages freed by each batch are
+returned to the filesystem with `PRAGMA incremental_vacuum`.
+"""
+
+# Standard Library
+import os
+import json
+import fcntl
+import asyncio
+from typing import Any, Dict, List, Optional
+from pathlib import Path
+from datetime import datetime, timedelta
+
+# Third Party
+from tortoise import Tortoise
+from tortoise.transactions import in_transaction
+
+# Project
+from stats.log import log
+from stats.config import params
+from stats.auth.models import ApiJob
+
+_ARCHIVE_FIELDS = ("id", "request_time", "complete_time", "detail")
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _write_archive(path: Path, jobs: List[Dict[str, Any]]) -> None:
+    """Append jobs to the archive file, and flush them to disk."""
+    with path.open("a") as archive:
+        for job in jobs:
+            archive.write(json.dumps(job, default=_json_default, separators=(",", ":")))
+            archive.write("\n")
+        archive.flush()
+        os.fsync(archive.fileno())
+
+
+async def _prune_batch(
+    cutoff: datetime, batch_size: int, archive_path: Optional[Path]
+) -> int:
+    """Archive & delete a single batch of completed jobs older than `cutoff`."""
+    async with in_transaction("default") as connection:
+        jobs = (
+            await ApiJob.filter(in_progress=False, request_time__lt=cutoff)
+            .using_db(connection)
+            .order_by("request_time", "id")
+            .limit(batch_size)
+            .values(*_ARCHIVE_FIELDS, requestor="requestor__username")
+        )
+
+        if not jobs:
+            return 0
+
+        if archive_path is not None:
+            # Archived before the delete is committed, so a failure can
+            # duplicate archived jobs, but never lose them.
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, _write_archive, archive_path, jobs)
+
+        await ApiJob.filter(id__in=[job["id"] for job in jobs]).using_db(
+            connection
+        ).delete()
+
+    return len(jobs)
+
+
+async def prune_jobs(
+    retention_days: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    archive_path: Optional[Path] = params.jobs.archive_path,
+    vacuum_pages: Optional[int] = None,
+) -> int:
+    """Archive & delete completed jobs older than the retention period.
+
+    Returns the number of deleted jobs. If `archive_path` is `None`, jobs
+    are deleted without being archived. A `vacuum_pages` value of `0`
+    reclaims all free pages after each batch.
+    """
+    if retention_days is None:
+        retention_days = params.jobs.retention_days
+    if batch_size is None:
+        batch_size = params.jobs.prune_batch_size
+    if vacuum_pages is None:
+        vacuum_pages = params.jobs.vacuum_pages
+
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    connection = Tortoise.get_connection("default")
+    total = 0
+
+    while True:
+        count = await _prune_batch(cutoff, batch_size, archive_path)
+        total += count
+
+        if count:
+            await connection.execute_script(
+                f"PRAGMA incremental_vacuum({int(vacuum_pages)})"
+            )
+
+        if count < batch_size:
+            break
+
+        # Let other writers acquire the write lock between batches.
+        await asyncio.sleep(0)
+
+    if total:
+        log.info("Pruned {} jobs completed before {}", total, cutoff.isoformat())
+
+    return total
+
+
+class RetentionTask:
+    """Periodically prune old jobs from one worker process at a time.
+
+    Every worker runs the task, but an exclusive, non-blocking lock on
+    `lock_path` ensures only one of them prunes during each interval.
+    """
+
+    def __init__(self, interval: float, lock_path: Path) -> None:
+        """Initialize RetentionTask()."""
+        self.interval = interval
+        self.lock_path = lock_path
+        self._task: Optional[asyncio.Task] = None
+
+    async def run_once(self) -> Optional[int]:
+        """Prune jobs if no other process is, returning the number pruned."""
+        with self.lock_path.open("a") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return None
+            try:
+                return await prune_jobs()
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.run_once()
+            except Exception as err:
+                log.error("Error pruning jobs: {}", repr(err))
+
+    async def start(self) -> None:
+        """Start pruning jobs periodically."""
+        self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        """Stop pruning jobs."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+retention_task = RetentionTask(
+    interval=params.jobs.prune_interval,
+    lock_path=params.api.dbmain_path.with_name("prune-jobs.lock"),
+)
@@ -0,0 +1,101 @@
+"""Signed, expiring API bearer tokens.
+
+Tokens are formatted as `<key id>.<payload>.<signature>`, where the payload
+is base64-encoded JSON containing the username & expiry time, and the
+signature is an HMAC-SHA256 of the key ID & payload. Tokens are verified
+against any configured key, so a new signing key can be introduced while
+tokens signed by the previous key are still valid.
+
+Tokens only identify a user. Routes are authorized against the in-memory
+authorization index, so deleting a user or removing a route applies to
+existing tokens once each worker reloads its index, which is within
+`auth.index_refresh` seconds, rather than when the token expires.
+"""
+
+# Standard Library
+import hmac
+import json
+import time
+import base64
+import hashlib
+import secrets
+from typing import Dict, Tuple, NamedTuple
+
+# Project
+from stats.log import log
+from stats.config import params
+from stats.exceptions import AuthError
+
+EPHEMERAL_KEY_ID = "ephemeral"
+
+
+def _signing_keys() -> Tuple[str, Dict[str, bytes]]:
+    """Get the current signing key ID & all verification keys."""
+    keys = {
+        key_id: secret.get_secret_value().encode()
+        for key_id, secret in params.auth.token_keys.items()
+    }
+
+    if not keys:
+        # Tokens signed by an ephemeral key are only valid until the process
+        # that generated the key exits.
+        log.warning("No API token keys are configured, using an ephemeral key")
+        return EPHEMERAL_KEY_ID, {EPHEMERAL_KEY_ID: secrets.token_bytes(32)}
+
+    return params.auth.token_key_id, keys
+
+
+_key_id, _keys = _signing_keys()
+
+
+class TokenClaims(NamedTuple):
+    """Verified token contents."""
+
+    username: str
+    expires: int
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _sign(key: bytes, message: str) -> str:
+    return _b64encode(hmac.new(key, message.encode(), hashlib.sha256).digest())
+
+
+def issue_token(username: str) -> Tuple[str, int]:
+    """Create a signed token for a user, returning the token & its expiry."""
+    expires = int(time.time()) + params.auth.token_ttl
+    claims = {"sub": username, "exp": expires}
+    payload = _b64encode(json.dumps(claims, separators=(",", ":")).encode())
+    message = f"{_key_id}.{payload}"
+    return f"{message}.{_sign(_keys[_key_id], message)}", expires
+
+
+def verify_token(token: str) -> TokenClaims:
+    """Verify a token's signature & expiry, and get its claims."""
+    try:
+        key_id, payload, signature = token.split(".")
+    except ValueError:
+        raise AuthError("Malformed API token", status_code=401) from None
+
+    key = _keys.get(key_id)
+
+    if key is None or not hmac.compare_digest(
+        signature, _sign(key, f"{key_id}.{payload}")
+    ):
+        raise AuthError("Invalid API token", status_code=401)
+
+    try:
+        claims = json.loads(_b64decode(payload))
+    except ValueError:
+        raise AuthError("Malformed API token", status_code=401) from None
+
+    if claims["exp"] <= time.time():
+        raise AuthError("API token for user '{u}' expired", u=claims["sub"])
+
+    return TokenClaims(username=claims["sub"], expires=claims["exp"])
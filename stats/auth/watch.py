@@ -0,0 +1,75 @@
+"""Detect changes to the SQLite database made by other connections."""
+
+# Standard Library
+import asyncio
+from typing import List, Callable, Optional, Awaitable
+
+# Third Party
+from tortoise import Tortoise
+
+# Project
+from stats.log import log
+
+Subscriber = Callable[[], Awaitable[None]]
+
+
+class DataVersionWatcher:
+    """Poll SQLite's `PRAGMA data_version` and notify subscribers on change.
+
+    `data_version` changes whenever another connection, including one in
+    another process, commits a change to the database. Polling it is a
+    single, cheap query that doesn't touch any tables.
+    """
+
+    def __init__(self, interval: float) -> None:
+        """Initialize DataVersionWatcher()."""
+        self.interval = interval
+        self.version: Optional[int] = None
+        self._subscribers: List[Subscriber] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(self, subscriber: Subscriber) -> None:
+        """Add a coroutine function to be called when the database changes."""
+        self._subscribers.append(subscriber)
+
+    async def data_version(self) -> int:
+        """Get the current data version."""
+        connection = Tortoise.get_connection("default")
+        _, rows = await connection.execute_query("PRAGMA data_version")
+        return rows[0][0]
+
+    async def check(self) -> bool:
+        """Notify subscribers if the database has changed since the last check."""
+        version = await self.data_version()
+
+        if version == self.version:
+            return False
+
+        self.version = version
+
+        for subscriber in self._subscribers:
+            try:
+                await subscriber()
+            except Exception as err:
+                log.error("Error handling database change: {}", repr(err))
+
+        return True
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.check()
+            except Exception as err:
+                log.error("Error checking database version: {}", repr(err))
+
+    async def start(self) -> None:
+        """Start polling for changes."""
+        self.version = await self.data_version()
+        self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        """Stop polling for changes."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
@@ -0,0 +1,126 @@
+"""Benchmark concurrent API database access across processes.
+
+Each process opens the database the way an API worker does, then creates
+jobs and performs authentication lookups in a loop. Comparing journal modes
+shows the effect of write-lock contention between worker processes.
+
+Run with `python -m stats.bench.authdb`.
+"""
+
+# Standard Library
+import time
+import asyncio
+import tempfile
+import statistics
+from typing import Dict, List
+from pathlib import Path
+from multiprocessing import Pool
+
+# Third Party
+from click import Choice, option, command
+from tortoise.exceptions import OperationalError
+
+# Project
+from stats.auth.main import (
+    get_job,
+    create_job,
+    authdb_stop,
+    create_user,
+    authdb_start,
+    create_route,
+    authdb_migrate,
+    associate_route,
+    authorize_route,
+)
+
+USERNAME = "bench"
+ROUTE = "/job/*"
+
+
+async def _setup(path: Path, journal_mode: str) -> None:
+    await authdb_migrate(path)
+    await authdb_start(path, journal_mode=journal_mode)
+    await create_user(USERNAME, "bench")
+    await create_route(ROUTE)
+    await associate_route(USERNAME, ROUTE)
+    await authdb_stop()
+
+
+async def _worker(path: Path, journal_mode: str, duration: float) -> Dict[str, List]:
+    await authdb_start(path, journal_mode=journal_mode)
+    samples = {"create_job": [], "get_job": [], "authorize": [], "errors": []}
+    deadline = time.perf_counter() + duration
+
+    while time.perf_counter() < deadline:
+        try:
+            started = time.perf_counter()
+            job = await create_job(USERNAME)
+            samples["create_job"].append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            await get_job(job.id)
+            samples["get_job"].append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            await authorize_route(USERNAME, f"/job/{job.id}")
+            samples["authorize"].append(time.perf_counter() - started)
+        except OperationalError as err:
+            samples["errors"].append(str(err))
+
+    await authdb_stop()
+    return samples
+
+
+def _run_worker(args) -> Dict[str, List]:
+    return asyncio.run(_worker(*args))
+
+
+def benchmark(processes: int, duration: float, journal_mode: str) -> Dict[str, Dict]:
+    """Run concurrent workers against a new database, returning per-op stats."""
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "bench.sqlite"
+        path.touch()
+        asyncio.run(_setup(path, journal_mode))
+
+        with Pool(processes) as pool:
+            results = pool.map(
+                _run_worker, [(path, journal_mode, duration)] * processes
+            )
+
+    summary = {}
+    for op in ("create_job", "get_job", "authorize"):
+        samples = sorted(s for result in results for s in result[op])
+        summary[op] = {
+            "ops_per_sec": len(samples) / duration,
+            "p50_ms": statistics.median(samples) * 1000 if samples else 0,
+            "p99_ms": samples[int(len(samples) * 0.99)] * 1000 if samples else 0,
+        }
+    summary["errors"] = sum(len(result["errors"]) for result in results)
+    return summary
+
+
+@command()
+@option("-p", "--processes", default=4, help="Concurrent worker processes")
+@option("-d", "--duration", default=5.0, help="Seconds to run each worker")
+@option(
+    "-j",
+    "--journal-mode",
+    type=Choice(["WAL", "DELETE"]),
+    default="WAL",
+    help="SQLite journal mode",
+)
+def main(processes, duration, journal_mode):
+    """Benchmark concurrent job creation & auth lookups."""
+    summary = benchmark(processes, duration, journal_mode)
+    errors = summary.pop("errors")
+    print(f"{'operation':<12}{'ops/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for op, result in summary.items():
+        print(
+            f"{op:<12}{result['ops_per_sec']:>10.1f}"
+            f"{result['p50_ms']:>10.2f}{result['p99_ms']:>10.2f}"
+        )
+    print(f"errors: {errors}")
+
+
+if __name__ == "__main__":
+    main()
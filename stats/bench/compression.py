@@ -0,0 +1,89 @@
+"""Benchmark response compression.
+
+Measures bytes on the wire and CPU time per request for uncompressed,
+compressed, and cached pre-compressed utilization responses. CPU time is
+measured in-process, so it includes the client decompressing the body.
+
+Run with `python -m stats.bench.compression`.
+"""
+
+# Standard Library
+import time
+import asyncio
+from typing import Dict
+
+# Third Party
+import httpx
+from click import option, command
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.applications import Starlette
+
+# Project
+from stats.api.cache import CachePolicy, ResponseCache
+from stats.api.responses import UtilizationResponse
+from stats.api.middleware import ENCODERS, CompressionMiddleware
+from stats.bench.serialization import synthetic_content
+
+
+def _app(points: int, cached: bool) -> Starlette:
+    """Create an app serving a fixed utilization response."""
+    content = synthetic_content(points)
+    response_cache = ResponseCache(max_entries=16, max_bytes=1024 ** 3)
+    app = Starlette()
+
+    @app.route("/utilization")
+    async def utilization(request: Request) -> Response:
+        cache = CachePolicy(request)
+        entry = response_cache.get(cache.etag) if cached else None
+        if entry is not None:
+            return cache.apply(entry.response())
+        response = cache.apply(UtilizationResponse(content))
+        if cached:
+            response_cache.put(cache, response)
+        return response
+
+    app.add_middleware(CompressionMiddleware, minimum_size=1024, cache=response_cache)
+    return app
+
+
+async def _measure(app: Starlette, encoding: str, requests: int) -> Dict[str, float]:
+    headers = {"accept-encoding": encoding}
+    async with httpx.AsyncClient(app=app, base_url="http://bench") as client:
+        # Warm up, which populates the cache where enabled.
+        response = await client.get("/utilization", headers=headers)
+        started = time.process_time()
+        for _ in range(requests):
+            response = await client.get("/utilization", headers=headers)
+        cpu = time.process_time() - started
+
+    return {
+        "bytes": int(response.headers["content-length"]),
+        "cpu_ms": cpu / requests * 1000,
+    }
+
+
+def benchmark(points: int, requests: int) -> Dict[str, Dict[str, float]]:
+    """Measure each encoding with & without the response cache."""
+    results = {}
+    for encoding in ("identity", *ENCODERS):
+        for cached in (False, True):
+            name = f"{encoding}{' (cached)' if cached else ''}"
+            results[name] = asyncio.run(
+                _measure(_app(points, cached), encoding, requests)
+            )
+    return results
+
+
+@command()
+@option("-p", "--points", default=10000, help="Data points per direction")
+@option("-n", "--requests", default=20, help="Requests per measurement")
+def main(points, requests):
+    """Compare response compression strategies."""
+    print(f"{'encoding':<20}{'bytes':>12}{'cpu ms/req':>12}")
+    for name, result in benchmark(points, requests).items():
+        print(f"{name:<20}{result['bytes']:>12,}{result['cpu_ms']:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""Local stand-in for InfluxDB, serving synthetic `interfaces` data.
+
+Queries are answered from generated data instead of a database: each port
+has a steady base rate with a daily cycle & random noise, for every
+`GROUP BY time()` bucket within the configured time span, up to now. The
+parts of a query that change the shape of its response are honored, which
+are the `port_id` tag, the time range, the bucket size, `LIMIT`,
+`GROUP BY port_id`, and whether the query aggregates to a single `mean(*)`
+or `max(*)` value. Everything else, like the selected field, is ignored.
+
+The server runs in a separate process, so generating responses doesn't
+compete with the code being measured for the GIL.
+
+Run with `python -m stats.bench.influx`, and point the API's `db` config
+at the listening address.
+"""
+
+# Standard Library
+import re
+import json
+import time
+import socket
+import multiprocessing
+from typing import Any, Dict, Tuple, Iterator, Optional
+from functools import lru_cache
+from contextlib import contextmanager
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import parse_qs, urlparse
+
+# Third Party
+import numpy as np
+import pendulum
+from click import option, command
+
+# Project
+from stats.constants import GRANULARITY
+from stats.exceptions import StatsError
+
+DAY = 86400
+
+_PORT_ID = re.compile(r"port_id='([^']*)'")
+_PERIOD = re.compile(r"now\(\) - (\d+)h")
+_START = re.compile(r"time >= '([^']+)'")
+_END = re.compile(r"time <= '([^']+)'")
+_BUCKET = re.compile(r"time\((\d+)([sm])\)")
+_LIMIT = re.compile(r"LIMIT (\d+)", re.IGNORECASE)
+_AGGREGATE = re.compile(r"^SELECT (mean|max)\(\*\)", re.IGNORECASE)
+
+
+class FakeInflux:
+    """Generate InfluxDB query responses from synthetic port statistics."""
+
+    def __init__(self, ports: int = 48, span: int = 24, seed: int = 48) -> None:
+        """Initialize FakeInflux()."""
+        self.span = span * 3600
+        self.port_ids = [f"bench.{n + 1}.1" for n in range(ports)]
+        rng = np.random.default_rng(seed)
+        # Mean bit rate of each port, between 10Mbps & 10Gbps.
+        self._rates = dict(zip(self.port_ids, 10 ** rng.uniform(7, 10, ports)))
+        self._seed = seed
+
+    def _values(self, port_id: str, times: np.ndarray) -> np.ndarray:
+        rate = self._rates[port_id]
+        daily = 1 + 0.5 * np.sin(2 * np.pi * (times % DAY) / DAY)
+        # Seeded by time, so overlapping queries return the same values.
+        rng = np.random.default_rng((self._seed, int(times[0]) if len(times) else 0))
+        return rate * daily * rng.uniform(0.8, 1.2, len(times))
+
+    def _series(
+        self, port_id: str, times: np.ndarray, aggregate: Optional[str]
+    ) -> Dict[str, Any]:
+        values = self._values(port_id, times)
+        tags = {"port_id": port_id, "participant_id": port_id.split(".")[1]}
+
+        if aggregate is not None:
+            value = getattr(values, aggregate)() if len(values) else 0.0
+            return {
+                "name": "interfaces",
+                "columns": ["time", f"{aggregate}_derivative"],
+                "values": [[int(times[0]) if len(times) else 0, float(value)]],
+            }
+
+        return {
+            "name": "interfaces",
+            "tags": tags,
+            "columns": ["time", "derivative"],
+            "values": [list(row) for row in zip(times.tolist(), values.tolist())],
+        }
+
+    def _window(self, query: str, now: int) -> Tuple[int, int]:
+        period = _PERIOD.search(query)
+        if period is not None:
+            return now - int(period.group(1)) * 3600, now
+
+        start, end = _START.search(query), _END.search(query)
+        start_time = pendulum.parse(start.group(1)).int_timestamp if start else 0
+        end_time = pendulum.parse(end.group(1)).int_timestamp if end else now
+        return start_time, min(end_time, now)
+
+    def response(self, query: str, now: Optional[int] = None) -> Dict[str, Any]:
+        """Answer a query with synthetic data, as InfluxDB's JSON response."""
+        now = int(time.time() if now is None else now)
+        bucket = GRANULARITY
+        match = _BUCKET.search(query)
+        if match is not None:
+            bucket = int(match.group(1)) * (60 if match.group(2) == "m" else 1)
+
+        start, end = self._window(query, now)
+        start = max(start, now - self.span)
+        times = np.arange(start - start % bucket + bucket, end + 1, bucket)
+
+        aggregate = _AGGREGATE.match(query)
+        aggregate = aggregate.group(1).lower() if aggregate else None
+        limit = _LIMIT.search(query)
+        if limit is not None and aggregate is None:
+            times = times[: int(limit.group(1))]
+
+        port_id = _PORT_ID.search(query)
+        if port_id is not None:
+            if port_id.group(1) not in self._rates:
+                return {"results": [{"statement_id": 0}]}
+            port_ids = [port_id.group(1)]
+        elif "GROUP BY port_id" in query and aggregate is None:
+            port_ids = self.port_ids
+        else:
+            # IX-wide aggregates are answered as though for a single port.
+            port_ids = self.port_ids[:1]
+
+        series = [self._series(each, times, aggregate) for each in port_ids]
+        return {"results": [{"statement_id": 0, "series": series}]}
+
+    def body(self, query: str, now: int) -> bytes:
+        """Encode a query's response, reusing it until the current bucket ends."""
+        return _cached_body(self, query, now - now % GRANULARITY)
+
+
+@lru_cache(maxsize=256)
+def _cached_body(fake: FakeInflux, query: str, now: int) -> bytes:
+    return json.dumps(fake.response(query, now)).encode()
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+
+class _Server6(_Server):
+    address_family = socket.AF_INET6
+
+
+def _handler(fake: FakeInflux, latency: float):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers & body are written separately, so avoid delayed ACK stalls.
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args: Any) -> None:
+            pass
+
+        def _send(self, status: int, body: bytes = b"") -> None:
+            self.send_response(status)
+            self.send_header("content-type", "application/json")
+            self.send_header("content-length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self) -> None:  # noqa: N802
+            url = urlparse(self.path)
+            if url.path == "/ping":
+                self._send(204)
+            elif url.path == "/query":
+                query = parse_qs(url.query).get("q", [""])[0]
+                if latency:
+                    time.sleep(latency)
+                self._send(200, fake.body(query, int(time.time())))
+            else:
+                self._send(404)
+
+    return Handler
+
+
+def serve(
+    host: str, port: int, ports: int, span: int, latency: float, ready=None
+) -> None:
+    """Serve synthetic data until the process is stopped."""
+    server_class = _Server6 if ":" in host else _Server
+    server = server_class((host, port), _handler(FakeInflux(ports, span), latency))
+    if ready is not None:
+        ready.send(server.server_address[1])
+    server.serve_forever()
+
+
+@contextmanager
+def running(
+    ports: int = 48,
+    span: int = 24,
+    latency: float = 0.0,
+    host: str = "127.0.0.1",
+    port: int = 0,
+) -> Iterator[Tuple[str, int]]:
+    """Run a fake InfluxDB server in a subprocess, yielding its address."""
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    process = multiprocessing.Process(
+        target=serve,
+        args=(host, port, ports, span, latency),
+        kwargs={"ready": sender},
+        daemon=True,
+    )
+    process.start()
+    # Closed here, so the pipe is closed if the server exits before it's ready.
+    sender.close()
+    try:
+        try:
+            if not receiver.poll(10):
+                raise EOFError
+            bound_port = receiver.recv()
+        except EOFError:
+            raise StatsError(
+                f"Fake InfluxDB server failed to start on {host}:{port}"
+            ) from None
+        yield host, bound_port
+    finally:
+        process.terminate()
+        process.join()
+
+
+@command()
+@option("-l", "--listen", default="127.0.0.1", help="Listen address")
+@option("-p", "--port", default=8086, help="Listen port")
+@option("-n", "--ports", default=48, help="Number of ports to generate data for")
+@option("-s", "--span", default=24, help="Hours of data, up to now")
+@option("-t", "--latency", default=0.0, help="Seconds to delay each query")
+def main(listen, port, ports, span, latency):
+    """Serve synthetic InfluxDB data."""
+    print(f"Serving {ports} ports, {span}h of data, on {listen}:{port}")
+    serve(listen, port, ports, span, latency)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""Generate load against a running API.
+
+Requests are chosen at random from a weighted mix of endpoints, and sent
+either by a fixed number of concurrent clients (closed loop), or at a
+fixed rate (open loop), with up to a fixed number in flight. At a fixed
+rate, latency is measured from when each request was due to be sent, so
+requests delayed by an overloaded API still count the time they waited.
+
+Latencies are recorded in HDR-style histograms, which keep a fixed
+relative precision from microseconds to minutes in a small, bounded
+number of buckets.
+
+Run with `stats bench`.
+"""
+
+# Standard Library
+import time
+import random
+import asyncio
+from typing import Any, Dict, List, Tuple, Optional, Sequence
+from collections import Counter
+
+# Third Party
+import httpx
+
+# Project
+from stats.exceptions import StatsError
+
+ENDPOINTS = ("port", "all", "job")
+
+PERCENTILES = (50, 75, 90, 95, 99, 99.9, 99.99, 100)
+
+
+class LatencyHistogram:
+    """Log-linear histogram of latencies, in microseconds.
+
+    Values are grouped by their highest set bit, then divided linearly into
+    `2 ** precision_bits` sub-buckets, so each bucket's width is at most
+    `1 / 2 ** precision_bits` of its values.
+    """
+
+    def __init__(self, precision_bits: int = 7) -> None:
+        """Initialize LatencyHistogram()."""
+        self.precision_bits = precision_bits
+        self.counts: Counter = Counter()
+        self.count = 0
+        self.total = 0
+        self.min = 0
+        self.max = 0
+
+    def _bucket(self, value: int) -> Tuple[int, int]:
+        # Keep the highest bit, plus `precision_bits` bits below it.
+        shift = max(value.bit_length() - self.precision_bits - 1, 0)
+        return shift, value >> shift
+
+    def record(self, seconds: float) -> None:
+        """Record a latency."""
+        value = max(int(seconds * 1e6), 1)
+        self.counts[self._bucket(value)] += 1
+        self.min = value if self.count == 0 else min(self.min, value)
+        self.max = max(self.max, value)
+        self.count += 1
+        self.total += value
+
+    @property
+    def mean(self) -> float:
+        """Get the mean latency, in microseconds."""
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, percentile: float) -> int:
+        """Get the latency at or below which `percentile`% of values are."""
+        if self.count == 0:
+            return 0
+        if percentile >= 100:
+            return self.max
+
+        target = max(self.count * percentile / 100, 1)
+        seen = 0
+        for (shift, sub_bucket), count in sorted(self.counts.items()):
+            seen += count
+            if seen >= target:
+                # The bucket's highest value, so percentiles are upper bounds.
+                return min(((sub_bucket + 1) << shift) - 1, self.max)
+        return self.max
+
+    def distribution(
+        self, percentiles: Sequence[float] = PERCENTILES
+    ) -> List[Tuple[float, int, int]]:
+        """Get each percentile's latency, and the number of values at or below it."""
+        rows = []
+        for percentile in percentiles:
+            value = self.percentile(percentile)
+            below = sum(
+                count
+                for (shift, sub_bucket), count in self.counts.items()
+                if sub_bucket << shift <= value
+            )
+            rows.append((percentile, value, below))
+        return rows
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    """Parse an endpoint mix, like `port=6,all=3,job=1`, into weights."""
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise StatsError(
+                f"Unknown endpoint '{name}', must be one of {', '.join(ENDPOINTS)}"
+            )
+        try:
+            weights[name] = float(weight or 1)
+        except ValueError:
+            raise StatsError(f"Invalid weight '{weight}' for endpoint '{name}'")
+
+    if not any(weight > 0 for weight in weights.values()):
+        raise StatsError("At least one endpoint must have a positive weight")
+    return weights
+
+
+class EndpointStats:
+    """Latencies & errors of requests to an endpoint."""
+
+    __slots__ = ("latency", "errors")
+
+    def __init__(self) -> None:
+        """Initialize EndpointStats()."""
+        self.latency = LatencyHistogram()
+        self.errors: Counter = Counter()
+
+    @property
+    def error_count(self) -> int:
+        """Get the number of failed requests."""
+        return sum(self.errors.values())
+
+
+class LoadGenerator:
+    """Send a weighted mix of requests to the API & record their latency."""
+
+    def __init__(
+        self,
+        url: str,
+        mix: Dict[str, float],
+        port_ids: Sequence[str] = (),
+        job_ids: Sequence[int] = (),
+        headers: Optional[Dict[str, str]] = None,
+        concurrency: int = 10,
+        rate: Optional[float] = None,
+        timeout: float = 30,
+    ) -> None:
+        """Initialize LoadGenerator()."""
+        if mix.get("port") and not port_ids:
+            raise StatsError("Port IDs are required to request port utilization")
+        if mix.get("job") and not job_ids:
+            raise StatsError("Job IDs are required to request job status")
+
+        self.url = url
+        self.endpoints, self.weights = zip(*mix.items())
+        self.port_ids = port_ids
+        self.job_ids = job_ids
+        self.headers = headers or {}
+        self.concurrency = concurrency
+        self.rate = rate
+        self.timeout = timeout
+        self.latency = LatencyHistogram()
+        self.stats = {endpoint: EndpointStats() for endpoint in self.endpoints}
+        self.elapsed = 0.0
+
+    @property
+    def count(self) -> int:
+        """Get the number of requests sent."""
+        return self.latency.count
+
+    @property
+    def error_count(self) -> int:
+        """Get the number of failed requests."""
+        return sum(stats.error_count for stats in self.stats.values())
+
+    def _choose(self) -> Tuple[str, str]:
+        endpoint = random.choices(self.endpoints, self.weights)[0]
+        if endpoint == "port":
+            return endpoint, f"/utilization/{random.choice(self.port_ids)}"
+        if endpoint == "job":
+            return endpoint, f"/job/{random.choice(self.job_ids)}"
+        return endpoint, "/utilization/all"
+
+    async def _send(self, client: httpx.AsyncClient, started: float) -> None:
+        endpoint, path = self._choose()
+        stats = self.stats[endpoint]
+        try:
+            response = await client.get(path)
+            if response.status_code >= 400:
+                stats.errors[str(response.status_code)] += 1
+        except Exception as err:
+            stats.errors[type(err).__name__] += 1
+
+        latency = time.perf_counter() - started
+        stats.latency.record(latency)
+        self.latency.record(latency)
+
+    async def _closed_loop(self, client: httpx.AsyncClient, duration: float) -> None:
+        deadline = time.perf_counter() + duration
+
+        async def worker() -> None:
+            while time.perf_counter() < deadline:
+                await self._send(client, time.perf_counter())
+
+        await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+
+    async def _open_loop(self, client: httpx.AsyncClient, duration: float) -> None:
+        in_flight = asyncio.Semaphore(self.concurrency)
+        start = time.perf_counter()
+        tasks = []
+
+        async def send(due: float) -> None:
+            async with in_flight:
+                await self._send(client, due)
+
+        for index in range(int(duration * self.rate)):
+            due = start + index / self.rate
+            delay = due - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.ensure_future(send(due)))
+
+        await asyncio.gather(*tasks)
+
+    async def run(self, duration: float) -> None:
+        """Send requests for `duration` seconds."""
+        started = time.perf_counter()
+        async with httpx.AsyncClient(
+            base_url=self.url, headers=self.headers, timeout=self.timeout
+        ) as client:
+            if self.rate:
+                await self._open_loop(client, duration)
+            else:
+                await self._closed_loop(client, duration)
+        self.elapsed = time.perf_counter() - started
+
+    def summary(self) -> Dict[str, Any]:
+        """Get overall throughput & error rate."""
+        return {
+            "requests": self.count,
+            "elapsed": self.elapsed,
+            "throughput": self.count / self.elapsed if self.elapsed else 0.0,
+            "errors": self.error_count,
+            "error_rate": self.error_count / self.count if self.count else 0.0,
+        }
@@ -0,0 +1,147 @@
+"""Benchmark utilization response encodings.
+
+Compares the default JSON pair format with the columnar JSON & Apache Arrow
+formats, measuring server-side encoding time, payload size, and the time a
+client needs to decode the payload into columns.
+
+Run with `python -m stats.bench.serialization`.
+"""
+
+# Standard Library
+import json
+import time
+import asyncio
+import statistics
+from typing import Any, Dict, Callable
+
+# Third Party
+import numpy as np
+from click import option, command
+
+# Project
+from stats.api.responses import (
+    TimeEncoding,
+    UtilizationResponse,
+    ArrowUtilizationResponse,
+    ColumnarUtilizationResponse,
+)
+from stats.database.series import Series
+
+
+def synthetic_series(points: int, start: int = 1594134000, step: int = 10) -> Series:
+    """Create a series of random bit rates at a fixed interval."""
+    return Series(
+        time=start + np.arange(points, dtype=np.int64) * step,
+        values=np.random.uniform(0, 1e10, (points, 1)),
+        columns=("derivative",),
+    )
+
+
+def synthetic_content(points: int) -> Dict[str, Any]:
+    """Create port utilization response content with synthetic series."""
+    return {
+        "ingress": synthetic_series(points),
+        "egress": synthetic_series(points),
+        "participant_id": 1,
+        "location": "bench",
+        "port_id": "bench.1.1",
+        "ingress_average": 1,
+        "egress_average": 1,
+    }
+
+
+async def _arrow_body(content: Dict[str, Any]) -> bytes:
+    response = ArrowUtilizationResponse(content)
+    return b"".join([chunk async for chunk in response.body_iterator])
+
+
+def _decode_time(encoded: Any) -> np.ndarray:
+    """Expand an encoded time column into every timestamp."""
+    if isinstance(encoded, list):
+        return np.array(encoded, dtype=np.int64)
+    if "step" in encoded:
+        return encoded["start"] + np.arange(encoded["count"]) * encoded["step"]
+    return np.cumsum([encoded["start"], *encoded["delta"]], dtype=np.int64)
+
+
+def _decode_json(body: bytes) -> None:
+    data = json.loads(body)
+    for key in ("ingress", "egress"):
+        # Timestamps are RFC 3339 strings in UTC.
+        np.array([pair[0].rstrip("Z") for pair in data[key]], dtype="datetime64[s]")
+        np.array([pair[1] for pair in data[key]])
+
+
+def _decode_columnar(body: bytes) -> None:
+    data = json.loads(body)
+    _decode_time(data["time"])
+    for key in ("ingress", "egress"):
+        np.array(data[key])
+
+
+def _decode_arrow(body: bytes) -> None:
+    # Third Party
+    import pyarrow as pa
+
+    pa.ipc.open_stream(body).read_all()
+
+
+def _timed(func: Callable[[], Any], rounds: int):
+    samples = []
+    result = None
+    for _ in range(rounds):
+        started = time.perf_counter()
+        result = func()
+        samples.append(time.perf_counter() - started)
+    return result, statistics.median(samples) * 1000
+
+
+def benchmark(points: int, rounds: int) -> Dict[str, Dict[str, float]]:
+    """Encode & decode each format, returning median timings in milliseconds."""
+    content = synthetic_content(points)
+    # Created outside the timed region, so only encoding is measured.
+    loop = asyncio.new_event_loop()
+    encoders = {
+        "json": lambda: UtilizationResponse(content).body,
+        "columnar": lambda: ColumnarUtilizationResponse(
+            content, time_encoding=TimeEncoding.step
+        ).body,
+        "arrow": lambda: loop.run_until_complete(_arrow_body(content)),
+    }
+    decoders = {
+        "json": _decode_json,
+        "columnar": _decode_columnar,
+        "arrow": _decode_arrow,
+    }
+    results = {}
+
+    try:
+        for name, encode in encoders.items():
+            body, encode_ms = _timed(encode, rounds)
+            _, decode_ms = _timed(lambda: decoders[name](body), rounds)
+            results[name] = {
+                "bytes": len(body),
+                "encode_ms": encode_ms,
+                "decode_ms": decode_ms,
+            }
+    finally:
+        loop.close()
+
+    return results
+
+
+@command()
+@option("-p", "--points", default=100000, help="Data points per direction")
+@option("-r", "--rounds", default=5, help="Rounds per measurement")
+def main(points, rounds):
+    """Compare utilization response encodings."""
+    print(f"{'format':<10}{'bytes':>14}{'encode ms':>12}{'decode ms':>12}")
+    for name, result in benchmark(points, rounds).items():
+        print(
+            f"{name:<10}{result['bytes']:>14,}"
+            f"{result['encode_ms']:>12.2f}{result['decode_ms']:>12.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""Benchmark InfluxDB queries & utilization endpoints against a fake InfluxDB.
+
+Measures query building & response parsing, every utilization action, and
+the full `/utilization` endpoints, with InfluxDB replaced by the synthetic
+data server in `stats.bench.influx`. Each benchmark runs sequentially for
+a fixed time, and reports its throughput & p50/p99 latency. The response
+cache is disabled, so every endpoint request queries InfluxDB.
+
+Results can be saved as JSON, and compared with a previous run's results
+to catch regressions.
+
+Run with `python -m stats.bench.suite`.
+"""
+
+# Standard Library
+import sys
+import json
+import time
+import asyncio
+import inspect
+import platform
+from typing import Any, Dict, List, Callable, Optional
+from pathlib import Path
+
+# Third Party
+import httpx
+import pendulum
+from click import Path as PathType
+from click import option, command
+
+# Project
+from stats.config import params
+from stats.api.main import api, response_cache
+from stats.constants import __version__
+from stats.bench.influx import FakeInflux, running
+from stats.database.driver import Influx
+from stats.actions.utilization import (
+    port_average_range,
+    port_average_period,
+    port_utilization_range,
+    port_utilization_period,
+    overall_utilization_period,
+    overall_utilization_max_period,
+    overall_utilization_average_period,
+)
+
+
+def _percentile(samples: List[float], percentile: float) -> float:
+    return samples[min(int(len(samples) * percentile), len(samples) - 1)]
+
+
+async def _call(func: Callable) -> None:
+    result = func()
+    # Actions are called by lambdas, which return their coroutines.
+    if inspect.isawaitable(result):
+        await result
+
+
+async def _measure(func: Callable, duration: float) -> Dict[str, float]:
+    """Call `func` repeatedly for `duration` seconds, after a warm up call."""
+    await _call(func)
+    samples = []
+    started = time.perf_counter()
+    deadline = started + duration
+
+    while time.perf_counter() < deadline:
+        call_started = time.perf_counter()
+        await _call(func)
+        samples.append(time.perf_counter() - call_started)
+
+    elapsed = time.perf_counter() - started
+    samples.sort()
+    return {
+        "count": len(samples),
+        "ops_per_sec": len(samples) / elapsed,
+        "p50_ms": _percentile(samples, 0.5) * 1000,
+        "p99_ms": _percentile(samples, 0.99) * 1000,
+    }
+
+
+def _benchmarks(fake: FakeInflux, client: httpx.AsyncClient) -> Dict[str, Callable]:
+    """Create each benchmark, as a callable to measure."""
+    port_id = fake.port_ids[0]
+    period = params.api.default_period
+    limit = params.api.default_limit
+    # A range that has fully elapsed, within the synthetic data's time span.
+    end = pendulum.now("UTC").subtract(hours=1)
+    start = end.subtract(hours=period).to_rfc3339_string()
+    end = end.to_rfc3339_string()
+
+    db = Influx("telegraf")
+    builder = (
+        db.SELECT("derivative(max(bytesIn), 1s) * 8")
+        .FROM("interfaces")
+        .BETWEEN(start, end)
+        .WHERE(port_id=port_id)
+        .GROUP("port_id", "participant_id")
+        .FILL("none")
+        .LIMIT(limit)
+    )
+    response = fake.response(builder._build_query())
+
+    async def parse():
+        await db._parse(response)
+
+    async def get(path: str, **query: Any):
+        (await client.get(path, params=query)).raise_for_status()
+
+    return {
+        "build_query": builder._build_query,
+        "parse": parse,
+        "port_utilization_period": lambda: port_utilization_period(
+            port_id, "in", period, limit
+        ),
+        "port_utilization_range": lambda: port_utilization_range(
+            port_id, "in", limit, start, end
+        ),
+        "port_average_period": lambda: port_average_period(
+            port_id, "in", period, limit
+        ),
+        "port_average_range": lambda: port_average_range(
+            port_id, "in", limit, start, end
+        ),
+        "overall_utilization_period": lambda: overall_utilization_period(
+            "in", period, limit
+        ),
+        "overall_utilization_average_period": lambda: (
+            overall_utilization_average_period("in", period, limit)
+        ),
+        "overall_utilization_max_period": lambda: overall_utilization_max_period(
+            "in", period, limit
+        ),
+        "GET /utilization/{port_id}?period": lambda: get(
+            f"/utilization/{port_id}", period=period
+        ),
+        "GET /utilization/{port_id}?start&end": lambda: get(
+            f"/utilization/{port_id}", start=start, end=end
+        ),
+        "GET /utilization/all": lambda: get("/utilization/all", period=period),
+    }
+
+
+async def _run_suite(
+    fake: FakeInflux, duration: float, only: Optional[str]
+) -> Dict[str, Dict[str, float]]:
+    response_cache.max_entries = 0
+    results = {}
+
+    async with httpx.AsyncClient(app=api, base_url="http://bench") as client:
+        for name, func in _benchmarks(fake, client).items():
+            if only is None or only in name:
+                results[name] = await _measure(func, duration)
+
+    return results
+
+
+def benchmark(
+    ports: int,
+    span: int,
+    latency: float,
+    duration: float,
+    limit: Optional[int] = None,
+    only: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Run the suite against a fake InfluxDB, returning results & run info."""
+    if limit is not None:
+        params.api.default_limit = limit
+
+    with running(ports=ports, span=span, latency=latency) as (host, port):
+        params.db.host, params.db.port, params.db.ssl = host, port, False
+        results = asyncio.run(_run_suite(FakeInflux(ports, span), duration, only))
+
+    return {
+        "version": __version__,
+        "python": platform.python_version(),
+        "time": pendulum.now("UTC").to_rfc3339_string(),
+        "options": {
+            "ports": ports,
+            "span": span,
+            "latency": latency,
+            "duration": duration,
+            "limit": params.api.default_limit,
+        },
+        "results": results,
+    }
+
+
+def compare(
+    results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]]
+) -> Dict[str, float]:
+    """Get the p50 change of each benchmark, as a fraction of the baseline."""
+    changes = {}
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous and previous["p50_ms"]:
+            changes[name] = result["p50_ms"] / previous["p50_ms"] - 1
+    return changes
+
+
+@command()
+@option("-n", "--ports", default=48, help="Number of ports in the fake InfluxDB")
+@option("-s", "--span", default=24, help="Hours of data in the fake InfluxDB")
+@option("-t", "--latency", default=0.0, help="Seconds to delay each query")
+@option("-d", "--duration", default=2.0, help="Seconds to run each benchmark")
+@option("-l", "--limit", type=int, help="Override the API's query limit")
+@option("-k", "--only", help="Only run benchmarks whose name contains this")
+@option("-o", "--output", type=PathType(dir_okay=False), help="Save results as JSON")
+@option(
+    "-c",
+    "--compare",
+    "baseline",
+    type=PathType(exists=True, dir_okay=False),
+    help="Compare with results saved by a previous run",
+)
+@option(
+    "--tolerance",
+    default=0.1,
+    help="p50 slowdown, as a fraction, beyond which a change is a regression",
+)
+def main(ports, span, latency, duration, limit, only, output, baseline, tolerance):
+    """Benchmark queries & utilization endpoints against a fake InfluxDB."""
+    run = benchmark(ports, span, latency, duration, limit, only)
+    results = run["results"]
+    changes = {}
+
+    if baseline is not None:
+        previous = json.loads(Path(baseline).read_text())
+        changes = compare(results, previous["results"])
+
+    print(f"{'benchmark':<40}{'ops/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'p50 Δ':>10}")
+    for name, result in results.items():
+        change = f"{changes[name]:+.1%}" if name in changes else ""
+        print(
+            f"{name:<40}{result['ops_per_sec']:>10.1f}"
+            f"{result['p50_ms']:>10.3f}{result['p99_ms']:>10.3f}{change:>10}"
+        )
+
+    if output is not None:
+        Path(output).write_text(json.dumps(run, indent=2))
+
+    regressions = [name for name, change in changes.items() if change > tolerance]
+    if regressions:
+        print(f"regressions: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -20,8 +20,13 @@ def main():
 
 def aiorun(coro, *args, **kwargs):
     """Safely await a coroutine with arguments, print a pretty response."""
+    # Project
+    from stats.database.series import Series
+
     try:
         res = asyncio.run(coro(*args, **kwargs))
+        if isinstance(res, Series):
+            res = res.dict()
         return res
     except Exception:
         echo.console.print_exception()
@@ -76,6 +81,14 @@ def port_average(port_id, time, direction, limit):
 @option("--direct", is_flag=True, default=False, help="Bypass Gunicorn")
 def start(listen_address, listen_port, debug, direct):
     """Start the Stats REST API."""
+    # Project
+    from stats.util import setup_metrics_dir
+    from stats.config import params
+
+    if not direct and params.metrics.enabled:
+        # Must happen before any module importing prometheus_client.
+        setup_metrics_dir(params.metrics.multiprocess_dir)
+
     # Project
     from stats.main import start as gunicorn_start
     from stats.api.main import start as direct_start
@@ -93,6 +106,241 @@ def start(listen_address, listen_port, debug, direct):
         echo.console.print_exception()
 
 
+@main.command()
+def migrate_db():
+    """Create or update the API database schema."""
+
+    # Project
+    from stats.config import params
+    from stats.auth.main import authdb_migrate
+
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(authdb_migrate())
+
+    echo("Migrated database {}", params.api.dbmain_path)
+
+
+@main.command()
+@option("-d", "--days", type=int, default=None, help="Retention period in days")
+@option("--no-archive", is_flag=True, default=False, help="Don't archive jobs")
+def prune_jobs(days, no_archive):
+    """Archive & delete completed jobs older than the retention period."""
+
+    # Project
+    from stats.config import params
+    from stats.auth.main import authdb_stop, authdb_start
+    from stats.auth.retention import prune_jobs as _prune_jobs
+
+    archive_path = None if no_archive else params.jobs.archive_path
+
+    async def _coro():
+        await authdb_start()
+        try:
+            return await _prune_jobs(retention_days=days, archive_path=archive_path)
+        finally:
+            await authdb_stop()
+
+    loop = asyncio.new_event_loop()
+    count = loop.run_until_complete(_coro())
+
+    echo("Pruned {} jobs", count)
+
+
+@main.command()
+def executor():
+    """Run queued jobs until interrupted.
+
+    Set `jobs.embedded_executor` to `false` to run jobs only here, rather
+    than in the API worker processes.
+    """
+
+    # Project
+    from stats.auth.main import db_watcher, authdb_stop, authdb_start
+    from stats.auth.notify import queue_notifier
+    from stats.actions.policy import policy_server
+    from stats.actions.executor import job_executor
+
+    async def _run():
+        await authdb_start()
+        db_watcher.subscribe(queue_notifier.notify_all)
+        await db_watcher.start()
+        await job_executor.start()
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await job_executor.stop()
+            await db_watcher.stop()
+            policy_server.close()
+            await authdb_stop()
+
+    echo("Running queued jobs...")
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(_run())
+    except KeyboardInterrupt:
+        pass
+
+
+@main.command()
+@option("-f", "--file", "path", default=None, help="Slow query log file")
+@option("-s", "--sort", default="total", help="Sort by total, count, mean, max...")
+@option("-n", "--top", default=20, help="Number of fingerprints")
+def slow_queries(path, sort, top):
+    """Summarize the slow query log by query fingerprint."""
+    # Standard Library
+    from pathlib import Path
+
+    # Third Party
+    from rich.table import Table
+
+    # Project
+    from stats.config import params
+    from stats.database.slowlog import SORT_KEYS, summarize_log, top_fingerprints
+
+    if sort not in SORT_KEYS:
+        echo("Sort must be one of {}", ", ".join(SORT_KEYS), error=True)
+        return
+
+    path = Path(path) if path else params.slow_queries.log_path
+    if path is None or not path.exists():
+        echo("No slow query log at {}", path, error=True)
+        return
+
+    columns = ("Fingerprint", "Kind", "Count", "Total (s)", "Mean (s)", "Max (s)")
+    table = Table(*columns, "Rows", "Bytes")
+
+    for stats in top_fingerprints(summarize_log(path), sort, top):
+        table.add_row(
+            stats.fingerprint,
+            stats.kind,
+            str(stats.count),
+            f"{stats.total:.3f}",
+            f"{stats.mean:.3f}",
+            f"{stats.max:.3f}",
+            str(stats.rows),
+            str(stats.bytes),
+        )
+
+    echo.console.print(table)
+
+
+@main.command()
+@option("-u", "--url", default=None, help="API URL, defaults to the listen address")
+@option("-m", "--mix", default="port=3,all=1", help="Endpoint weights: port, all, job")
+@option("-c", "--concurrency", default=10, help="Concurrent requests")
+@option("-r", "--rate", type=float, default=None, help="Requests per second")
+@option("-d", "--duration", default=10.0, help="Seconds to send requests")
+@option("-p", "--port-id", "port_ids", multiple=True, help="Port ID to request")
+@option("-j", "--job-id", "job_ids", multiple=True, type=int, help="Job ID to request")
+@option("--user", default=None, help="API username, for job requests")
+@option("--key", default=None, help="API key, for job requests")
+@option("--fake-influx", is_flag=True, default=False, help="Serve synthetic data")
+@option("--fake-ports", default=48, help="Number of ports in the fake InfluxDB")
+@option("--fake-latency", default=0.0, help="Seconds to delay each fake query")
+def bench(
+    url,
+    mix,
+    concurrency,
+    rate,
+    duration,
+    port_ids,
+    job_ids,
+    user,
+    key,
+    fake_influx,
+    fake_ports,
+    fake_latency,
+):
+    """Send a mix of requests to a running API & report latency.
+
+    Requests are sent by `--concurrency` clients, or at `--rate` requests
+    per second with up to `--concurrency` in flight. With `--fake-influx`,
+    synthetic data is served at the configured InfluxDB address, so the
+    API can be load tested without a database.
+    """
+    # Standard Library
+    from contextlib import nullcontext
+
+    # Third Party
+    from rich.table import Table
+
+    # Project
+    from stats.config import params
+    from stats.bench.load import LoadGenerator, parse_mix
+    from stats.exceptions import StatsError
+    from stats.bench.influx import FakeInflux, running
+
+    if url is None:
+        host = str(params.listen_address)
+        if ":" in host:
+            host = f"[{host}]"
+        url = f"http://{host}:{params.listen_port}"
+
+    headers = {}
+    if user and key:
+        headers = {"x-48ix-api-user": user, "x-48ix-api-key": key}
+
+    fake = nullcontext()
+    if fake_influx:
+        if params.db.ssl:
+            echo("The fake InfluxDB doesn't support SSL", error=True)
+            return
+        fake = running(
+            ports=fake_ports,
+            latency=fake_latency,
+            host=params.db.host,
+            port=params.db.port,
+        )
+        port_ids = port_ids or FakeInflux(fake_ports).port_ids
+
+    try:
+        generator = LoadGenerator(
+            url,
+            parse_mix(mix),
+            port_ids=port_ids,
+            job_ids=job_ids,
+            headers=headers,
+            concurrency=concurrency,
+            rate=rate,
+        )
+        with fake:
+            target = f"{rate:g} requests/s" if rate else f"{concurrency} clients"
+            echo("Sending requests to {} at {} for {}s...", url, target, duration)
+            asyncio.run(generator.run(duration))
+    except StatsError as err:
+        echo(str(err), error=True)
+        return
+
+    summary = generator.summary()
+    echo(
+        "{} requests in {}s: {} requests/s, {} errors ({})",
+        summary["requests"],
+        f"{summary['elapsed']:.1f}",
+        f"{summary['throughput']:.1f}",
+        summary["errors"],
+        f"{summary['error_rate']:.2%}",
+    )
+
+    columns = ("Endpoint", "Requests", "Errors", "p50 (ms)", "p99 (ms)", "Max (ms)")
+    endpoints = Table(*columns)
+    for endpoint, stats in generator.stats.items():
+        errors = ", ".join(f"{k}: {v}" for k, v in stats.errors.most_common())
+        endpoints.add_row(
+            endpoint,
+            str(stats.latency.count),
+            errors or "0",
+            f"{stats.latency.percentile(50) / 1000:.2f}",
+            f"{stats.latency.percentile(99) / 1000:.2f}",
+            f"{stats.latency.max / 1000:.2f}",
+        )
+    echo.console.print(endpoints)
+
+    distribution = Table("Percentile", "Latency (ms)", "Requests")
+    for percentile, value, count in generator.latency.distribution():
+        distribution.add_row(f"{percentile:g}%", f"{value / 1000:.2f}", str(count))
+    echo.console.print(distribution)
+
+
 @main.command()
 def create_api_user():
     """Create an API User."""
@@ -1,17 +1,24 @@
 """Validation model for Stats configuration."""
 
+# Standard Library
+from typing import Dict, Optional
+from pathlib import Path
+
 # Third Party
 from pydantic import (
     FilePath,
     BaseModel,
+    SecretStr,
     StrictInt,
     StrictStr,
     StrictBool,
     IPvAnyAddress,
+    confloat,
+    validator,
 )
 
 # Project
-from stats.constants import DB_MAIN
+from stats.constants import DB_MAIN, METRICS_DIR, JOBS_ARCHIVE, SLOW_QUERY_LOG
 
 
 class PolicyServer(BaseModel):
@@ -19,6 +26,11 @@ class PolicyServer(BaseModel):
 
     host: StrictStr
     port: StrictInt = 4801
+    pool_size: StrictInt = 2
+    timeout: StrictInt = 300
+    connect_timeout: StrictInt = 5
+    heartbeat: StrictInt = 30
+    coalesce_window: confloat(ge=0) = 1.0
 
 
 class DatabaseServer(BaseModel):
@@ -42,6 +54,14 @@ class DatabaseServer(BaseModel):
         return template.format(protocol=protocol, host=str(self.host), port=port)
 
 
+class SlowQueries(BaseModel):
+    """InfluxDB slow query log parameters validation model."""
+
+    threshold: confloat(ge=0) = 1.0
+    max_fingerprints: StrictInt = 256
+    log_path: Optional[Path] = SLOW_QUERY_LOG
+
+
 class Api(BaseModel):
     """REST API configuration parameters validation model."""
 
@@ -50,6 +70,100 @@ class Api(BaseModel):
     default_period: StrictInt = 8
     default_limit: StrictInt = 100
     dbmain_path: FilePath = DB_MAIN
+    dbmain_busy_timeout: StrictInt = 5000
+    dbmain_cache_size: StrictInt = -8000
+    dbmain_synchronous: StrictStr = "NORMAL"
+    dbmain_read_connections: StrictInt = 2
+    compression_min_size: StrictInt = 1024
+    response_cache_entries: StrictInt = 256
+    response_cache_bytes: StrictInt = 64 * 1024 * 1024
+    cache_settle: StrictInt = 300
+
+
+class Auth(BaseModel):
+    """API authentication parameters validation model."""
+
+    verify_threads: StrictInt = 2
+    cache_ttl: StrictInt = 60
+    cache_entries: StrictInt = 1024
+    index_refresh: StrictInt = 1
+    token_ttl: StrictInt = 3600
+    token_keys: Dict[StrictStr, SecretStr] = {}
+    token_key_id: Optional[StrictStr]
+
+    @validator("token_key_id", always=True)
+    def validate_token_key_id(cls, value, values):
+        """Use the first token key by default, and ensure the key exists."""
+        keys = values.get("token_keys", {})
+        if value is None and keys:
+            return next(iter(keys))
+        if value is not None and value not in keys:
+            raise ValueError(f"Token key '{value}' is not defined in 'token_keys'")
+        return value
+
+
+class Jobs(BaseModel):
+    """API job parameters validation model."""
+
+    max_wait: StrictInt = 60
+    events_keepalive: StrictInt = 15
+    embedded_executor: StrictBool = True
+    executor_slots: StrictInt = 2
+    lease_ttl: StrictInt = 60
+    max_attempts: StrictInt = 3
+    retry_backoff: StrictInt = 5
+    queue_poll: StrictInt = 5
+    detail_flush_interval: confloat(gt=0) = 1.0
+    detail_flush_size: StrictInt = 4096
+    detail_max_length: StrictInt = 65536
+    retention_days: StrictInt = 90
+    prune_interval: StrictInt = 3600
+    prune_batch_size: StrictInt = 500
+    vacuum_pages: StrictInt = 256
+    archive_path: Optional[Path] = JOBS_ARCHIVE
+
+
+class Metrics(BaseModel):
+    """Prometheus metrics parameters validation model."""
+
+    enabled: StrictBool = True
+    multiprocess_dir: Path = METRICS_DIR
+
+
+class Tracing(BaseModel):
+    """Request tracing parameters validation model."""
+
+    server_timing: StrictBool = False
+    export_path: Optional[Path]
+
+    @property
+    def enabled(self) -> bool:
+        """Determine if requests should be traced."""
+        return self.server_timing or self.export_path is not None
+
+
+class Profiling(BaseModel):
+    """Worker profiling parameters validation model."""
+
+    enabled: StrictBool = False
+    max_seconds: StrictInt = 30
+    sample_interval: confloat(gt=0) = 0.005
+
+
+class Memory(BaseModel):
+    """Memory usage & allocation tracking parameters validation model."""
+
+    tracemalloc: StrictBool = False
+    tracemalloc_frames: StrictInt = 1
+    sample_interval: confloat(gt=0) = 5.0
+
+
+class Watchdog(BaseModel):
+    """Event loop lag & stall detection parameters validation model."""
+
+    enabled: StrictBool = True
+    interval: confloat(gt=0) = 0.1
+    stall_threshold: confloat(gt=0) = 0.5
 
 
 class Params(BaseModel):
@@ -58,6 +172,14 @@ class Params(BaseModel):
     debug: StrictBool = False
     db: DatabaseServer
     api: Api = Api()
+    auth: Auth = Auth()
+    jobs: Jobs = Jobs()
+    metrics: Metrics = Metrics()
+    tracing: Tracing = Tracing()
+    slow_queries: SlowQueries = SlowQueries()
+    profiling: Profiling = Profiling()
+    memory: Memory = Memory()
+    watchdog: Watchdog = Watchdog()
     listen_address: IPvAnyAddress = "::1"
     listen_port: StrictInt = 8001
     policy_server: PolicyServer
@@ -1,10 +1,17 @@
 """Stats constants."""
 
 # Standard Library
+import tempfile
 from pathlib import Path
 
 CONFIG_DIR = Path("/etc/48ix-stats")
 CONFIG_MAIN = CONFIG_DIR / "config.yaml"
 DB_MAIN = CONFIG_DIR / "db-main.sqlite"
+JOBS_ARCHIVE = CONFIG_DIR / "jobs-archive.jsonl"
+SLOW_QUERY_LOG = CONFIG_DIR / "slow-queries.jsonl"
+METRICS_DIR = Path(tempfile.gettempdir()) / "48ix-stats-metrics"
+
+# InfluxDB `GROUP BY time()` interval, in seconds.
+GRANULARITY = 10
 
 __version__ = "0.0.1"
@@ -1,5 +1,8 @@
 """InfluxDB driver."""
 
+# Standard Library
+import time
+
 # Third Party
 import pendulum
 
@@ -7,9 +10,14 @@ import pendulum
 from stats.log import log as _logger
 from stats.util import intersperse, clean_keyname
 from stats.config import params
-from stats.constants import __version__
+from stats.memory import track
+from stats.metrics import INFLUX_QUERY_LATENCY
+from stats.tracing import span
+from stats.constants import GRANULARITY, __version__
 from stats.exceptions import StatsError
 from stats.http.client import BaseHttpClient
+from stats.database.series import Series
+from stats.database.slowlog import query_log
 
 
 class Influx(BaseHttpClient):
@@ -33,12 +41,13 @@ class Influx(BaseHttpClient):
         self.selections = None
         self.where = None
         self.measurement = None
-        self.granularity = 10
+        self.granularity = GRANULARITY
         self.group_by = None
         self.fill = None
         self.limit = None
 
-    async def _parse(self, response):
+    async def _parse(self, response) -> Series:
+        """Parse the first series of an InfluxDB response into a Series."""
         try:
             results = response.get("results", [{}])[0]
             if "error" in results:
@@ -48,7 +57,7 @@ class Influx(BaseHttpClient):
                 series = results.get("series", [{}])
         except (KeyError, IndexError):
             series = [{}]
-        return series[0]
+        return Series.from_influx(series[0])
 
     async def running(self):
         """Ensure InfluxDB is running."""
@@ -98,18 +107,27 @@ class Influx(BaseHttpClient):
 
         return query_string
 
-    async def query(self, raw=False):
-        """Execute the query."""
-        await self.running()
-        if raw:
-            query = raw
-        else:
-            query = self._build_query()
+    async def query(self, raw=False, kind: str = "raw") -> Series:
+        """Execute the query, recording its latency by `kind`."""
+        with span("influx", kind=kind):
+            start = time.perf_counter()
+            await self.running()
+            if raw:
+                query = raw
+            else:
+                query = self._build_query()
 
-        self.log.info(query)
-        response = await self._aget("query", params={"q": query, "db": self.database})
+            with track("influx"):
+                response = await self._aget(
+                    "query", params={"q": query, "db": self.database, "epoch": "s"}
+                )
+            with track("parse"):
+                series = await self._parse(response)
 
-        return await self._parse(response)
+            duration = time.perf_counter() - start
+            INFLUX_QUERY_LATENCY.labels(kind).observe(duration)
+            query_log.record(kind, query, duration, len(series), self.response_size)
+            return series
 
     def SELECT(self, *selections):
         """Set selections, like 'SELECT <selection>' in line-protocol."""
@@ -132,7 +150,10 @@ class Influx(BaseHttpClient):
     def BETWEEN(self, start_time, end_time=None):
         """Set time range."""
         self.start_time = pendulum.parse(start_time, tz="Etc/UTC")
-        self.end_time = end_time or pendulum.now("Etc/UTC")
+        if end_time is None:
+            self.end_time = pendulum.now("Etc/UTC")
+        else:
+            self.end_time = pendulum.parse(end_time, tz="Etc/UTC")
         return self
 
     def WHERE(self, tags=None, **kwargs):
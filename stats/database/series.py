@@ -0,0 +1,199 @@
+"""Columnar representation of InfluxDB series data."""
+
+# Standard Library
+from typing import Any, Dict, List, Tuple, Optional, Sequence
+
+# Third Party
+import numpy as np
+
+_EMPTY_TIME = np.empty(0, dtype=np.int64)
+
+
+def _parse_time(times: Sequence) -> np.ndarray:
+    """Convert InfluxDB timestamps to an int64 array of UNIX epoch seconds.
+
+    Timestamps are expected to be epoch integers (queried with `epoch=s`),
+    but RFC3339 strings are handled as a fallback.
+    """
+    if len(times) == 0:
+        return _EMPTY_TIME
+
+    if isinstance(times[0], str):
+        parsed = np.array([t.rstrip("Z") for t in times], dtype="datetime64[ns]")
+        return parsed.astype("datetime64[s]").astype(np.int64)
+
+    return np.asarray(times, dtype=np.int64)
+
+
+class Series:
+    """Columnar time series with an int64 time array & 2D value array.
+
+    Each row of `values` corresponds to a timestamp in `time`, and each
+    column corresponds to a selected field, in the order of `columns`.
+    """
+
+    __slots__ = ("name", "tags", "columns", "time", "values")
+
+    def __init__(
+        self,
+        time: np.ndarray,
+        values: np.ndarray,
+        columns: Tuple[str, ...] = (),
+        name: Optional[str] = None,
+        tags: Optional[Dict[str, str]] = None,
+    ) -> None:
+        """Initialize Series()."""
+        self.time = time
+        self.values = values
+        self.columns = tuple(columns)
+        self.name = name
+        self.tags = tags or {}
+
+    @classmethod
+    def from_influx(cls, series: Dict[str, Any]) -> "Series":
+        """Build a Series from a single InfluxDB JSON series object."""
+        columns = series.get("columns", [])[1:]
+        rows = series.get("values", [])
+
+        if not rows:
+            return cls.empty(columns=columns, name=series.get("name"))
+
+        time = _parse_time([row[0] for row in rows])
+        values = np.array([row[1:] for row in rows], dtype=np.float64)
+
+        return cls(
+            time=time,
+            values=values.reshape(len(rows), -1),
+            columns=columns,
+            name=series.get("name"),
+            tags=series.get("tags"),
+        )
+
+    @classmethod
+    def empty(cls, columns: Sequence[str] = (), name: Optional[str] = None):
+        """Create a Series with no data points."""
+        return cls(
+            time=_EMPTY_TIME,
+            values=np.empty((0, max(len(columns), 1)), dtype=np.float64),
+            columns=tuple(columns),
+            name=name,
+        )
+
+    def __len__(self) -> int:
+        """Get the number of data points."""
+        return len(self.time)
+
+    def __repr__(self) -> str:
+        """Summarize the series without rendering every data point."""
+        return (
+            f"Series(name={self.name!r}, columns={self.columns!r}, "
+            f"tags={self.tags!r}, points={len(self)})"
+        )
+
+    def column(self, index: int = 0) -> np.ndarray:
+        """Get a single value column."""
+        return self.values[:, index]
+
+    def ceil(self) -> "Series":
+        """Round values up to whole integers.
+
+        Values are converted to int64. If the series contains nulls, which
+        can't be represented as integers, an object array of integers and
+        `None` is returned instead.
+        """
+        values = np.ceil(self.values)
+        nulls = np.isnan(values)
+
+        if nulls.any():
+            values = np.where(nulls, None, np.nan_to_num(values).astype(np.int64))
+        else:
+            values = values.astype(np.int64)
+
+        return Series(
+            time=self.time,
+            values=values,
+            columns=self.columns,
+            name=self.name,
+            tags=self.tags,
+        )
+
+    def first(self, column: int = 0, default: Any = 0) -> Any:
+        """Get the first value of a column, or `default` if empty or null."""
+        if len(self) == 0:
+            return default
+
+        value = self.values[0, column].item()
+
+        if value != value:
+            # NaN is never equal to itself.
+            return default
+
+        return value
+
+    def timestamps(self) -> List[str]:
+        """Render timestamps as RFC3339 strings, as InfluxDB would."""
+        rendered = np.datetime_as_string(
+            self.time.astype("datetime64[s]"), unit="s", timezone="UTC"
+        )
+        return rendered.tolist()
+
+    def pairs(self, column: int = 0) -> List[List]:
+        """Materialize a column as a list of `[timestamp, value]` pairs."""
+        values = self.column(column)
+
+        if values.dtype.kind == "f" and np.isnan(values).any():
+            values = np.where(np.isnan(values), None, values)
+
+        return [list(pair) for pair in zip(self.timestamps(), values.tolist())]
+
+    def dict(self) -> Dict[str, Any]:
+        """Materialize the series in InfluxDB's JSON series format."""
+        rows = []
+
+        if len(self) != 0:
+            rows = [
+                [timestamp, *values]
+                for timestamp, values in zip(self.timestamps(), self.values.tolist())
+            ]
+
+        return {
+            "name": self.name,
+            "tags": self.tags,
+            "columns": ["time", *self.columns],
+            "values": rows,
+        }
+
+
+def _union_time(*times: np.ndarray) -> np.ndarray:
+    """Get the sorted, unique union of several timestamp arrays."""
+    first, *rest = times
+
+    if all(np.array_equal(first, other) for other in rest):
+        return first
+
+    merged = np.concatenate(times)
+    # Each input is already sorted, which mergesort handles in linear time.
+    merged.sort(kind="mergesort")
+    unique = np.empty(len(merged), dtype=bool)
+    unique[:1] = True
+    np.not_equal(merged[1:], merged[:-1], out=unique[1:])
+    return merged[unique]
+
+
+def align(*series: Series, columns: Sequence[str], column: int = 0) -> Series:
+    """Align one column of several series on a shared time axis.
+
+    The resulting series contains one value column per input series, keyed
+    by the union of all input timestamps. Timestamps missing from an input
+    series are filled with NaN.
+    """
+    time = _union_time(*(each.time for each in series))
+
+    values = np.full((len(time), len(series)), np.nan, dtype=np.float64)
+
+    for index, each in enumerate(series):
+        if len(each) != 0:
+            positions = np.searchsorted(time, each.time)
+            values[positions, index] = each.column(column)
+
+    return Series(time=time, values=values, columns=columns)
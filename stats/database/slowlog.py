@@ -0,0 +1,207 @@
+"""InfluxDB query statistics & slow query log.
+
+Queries are grouped by fingerprint, which is the query with its literals,
+such as port IDs, timestamps, durations & limits, replaced by `?`, so
+every request for the same view shares a fingerprint. Statistics are
+kept per process, for all queries. Queries slower than the threshold are
+also logged, and appended to a JSON lines file that `stats slow-queries`
+summarizes across all processes.
+"""
+
+# Standard Library
+import re
+import json
+import time
+from typing import Any, Dict, List, Iterable, Optional
+from pathlib import Path
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+
+# Project
+from stats.log import log
+from stats.config import params
+
+_LITERALS = (
+    # Quoted strings, such as tag values & timestamps.
+    (re.compile(r"'(?:[^'\\]|\\.)*'"), "?"),
+    # Numbers & durations, such as `8h`, `10s` & `LIMIT 100`.
+    (re.compile(r"\b\d+(?:\.\d+)?[a-z]*\b"), "?"),
+    (re.compile(r"\s+"), " "),
+)
+
+# Fingerprint used once `max_fingerprints` distinct fingerprints are tracked.
+OTHER = "(other)"
+
+SORT_KEYS = ("total", "count", "mean", "max", "rows", "bytes")
+
+
+@lru_cache(maxsize=1024)
+def fingerprint(query: str) -> str:
+    """Normalize a query by replacing its literals with placeholders."""
+    for pattern, replacement in _LITERALS:
+        query = pattern.sub(replacement, query)
+    return query.strip()
+
+
+class FingerprintStats:
+    """Aggregate statistics of queries sharing a fingerprint."""
+
+    __slots__ = (
+        "fingerprint",
+        "kind",
+        "count",
+        "slow",
+        "total",
+        "max",
+        "rows",
+        "bytes",
+    )
+
+    def __init__(self, fingerprint: str, kind: str) -> None:
+        """Initialize FingerprintStats()."""
+        self.fingerprint = fingerprint
+        self.kind = kind
+        self.count = 0
+        self.slow = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.rows = 0
+        self.bytes = 0
+
+    def add(self, duration: float, rows: int, size: int) -> None:
+        """Add a query's statistics."""
+        self.count += 1
+        self.total += duration
+        self.max = max(self.max, duration)
+        self.rows += rows
+        self.bytes += size
+
+    @property
+    def mean(self) -> float:
+        """Get the mean query duration."""
+        return self.total / self.count if self.count else 0.0
+
+    def dict(self) -> Dict[str, Any]:
+        """Get the statistics as a dictionary."""
+        return {
+            "fingerprint": self.fingerprint,
+            "kind": self.kind,
+            "count": self.count,
+            "slow": self.slow,
+            "total": self.total,
+            "mean": self.mean,
+            "max": self.max,
+            "rows": self.rows,
+            "bytes": self.bytes,
+        }
+
+
+def top_fingerprints(
+    stats: Iterable[FingerprintStats], sort: str = "total", limit: int = 20
+) -> List[FingerprintStats]:
+    """Get the fingerprints with the highest value of `sort`."""
+    return sorted(stats, key=lambda s: getattr(s, sort), reverse=True)[:limit]
+
+
+class QueryLog:
+    """Record query statistics by fingerprint & log slow queries."""
+
+    def __init__(
+        self, threshold: float, max_fingerprints: int, log_path: Optional[Path] = None
+    ) -> None:
+        """Initialize QueryLog()."""
+        self.threshold = threshold
+        self.max_fingerprints = max_fingerprints
+        self.log_path = log_path
+        self.since = time.time()
+        self._stats: Dict[str, FingerprintStats] = {}
+        self._file = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slowlog")
+
+    def _stats_for(self, query: str, kind: str) -> FingerprintStats:
+        key = fingerprint(query)
+        stats = self._stats.get(key)
+
+        if stats is None:
+            if len(self._stats) >= self.max_fingerprints:
+                key, kind = OTHER, OTHER
+                stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = FingerprintStats(key, kind)
+
+        return stats
+
+    def _write(self, entry: Dict[str, Any]) -> None:
+        try:
+            if self._file is None:
+                self._file = self.log_path.open("a", buffering=1)
+            self._file.write(json.dumps(entry) + "\n")
+        except OSError as err:
+            log.error("Error writing slow query log: {}", repr(err))
+
+    def record(
+        self, kind: str, query: str, duration: float, rows: int, size: int
+    ) -> None:
+        """Record a query's duration, number of rows & response size in bytes."""
+        stats = self._stats_for(query, kind)
+        stats.add(duration, rows, size)
+
+        if duration < self.threshold:
+            return
+
+        stats.slow += 1
+        log.warning(
+            "Slow {} query took {:.3f}s ({} rows, {} bytes): {}",
+            kind,
+            duration,
+            rows,
+            size,
+            query,
+        )
+
+        if self.log_path is not None:
+            entry = {
+                "time": time.time(),
+                "kind": kind,
+                "fingerprint": fingerprint(query),
+                "query": query,
+                "duration": duration,
+                "rows": rows,
+                "bytes": size,
+            }
+            self._executor.submit(self._write, entry)
+
+    def top(self, sort: str = "total", limit: int = 20) -> List[FingerprintStats]:
+        """Get this process's top fingerprints."""
+        return top_fingerprints(self._stats.values(), sort, limit)
+
+    def reset(self) -> None:
+        """Clear all statistics."""
+        self._stats.clear()
+        self.since = time.time()
+
+
+def summarize_log(path: Path) -> List[FingerprintStats]:
+    """Aggregate the entries of a slow query log file by fingerprint."""
+    stats: Dict[str, FingerprintStats] = {}
+
+    with path.open() as log_file:
+        for line in log_file:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            key = entry["fingerprint"]
+            if key not in stats:
+                stats[key] = FingerprintStats(key, entry["kind"])
+            stats[key].add(entry["duration"], entry["rows"], entry["bytes"])
+            stats[key].slow += 1
+
+    return list(stats.values())
+
+
+query_log = QueryLog(
+    threshold=params.slow_queries.threshold,
+    max_fingerprints=params.slow_queries.max_fingerprints,
+    log_path=params.slow_queries.log_path,
+)
@@ -123,3 +123,14 @@ class AuthError(_UnFmtError):
         """Set status code."""
         super().__init__(*args, **kwargs)
         self.status_code = kwargs.get("status_code", self._status_code)
+
+
+class RequestError(_UnFmtError):
+    """Raised for API requests that can't be fulfilled as made."""
+
+    _status_code = 400
+
+    def __init__(self, *args, **kwargs):
+        """Set status code."""
+        super().__init__(*args, **kwargs)
+        self.status_code = kwargs.get("status_code", self._status_code)
@@ -43,6 +43,8 @@ class BaseHttpClient:
         self.log = logger
         self.exception_class = exception_class
         self.user_agent = user_agent
+        # Size of the last response body, in bytes.
+        self.response_size = 0
 
         session_args = {
             "verify": self.verify_ssl,
@@ -305,6 +307,7 @@ class BaseHttpClient:
         except httpx.HTTPError as http_err:
             raise self._exception(self._parse_exception(http_err)) from None
 
+        self.response_size = len(response.content)
         return self._parse_response(response)
 
     async def _aget(self, endpoint, **kwargs):
@@ -363,6 +366,7 @@ class BaseHttpClient:
                 self._parse_exception(http_err), level="danger"
             ) from None
 
+        self.response_size = len(response.content)
         return self._parse_response(response)
 
     def _get(self, endpoint, **kwargs):
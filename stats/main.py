@@ -1,7 +1,9 @@
 """Gunicorn Config File."""
 
 # Standard Library
+import os
 import shutil
+import asyncio
 
 # Third Party
 from gunicorn.app.base import BaseApplication
@@ -9,6 +11,7 @@ from gunicorn.app.base import BaseApplication
 # Project
 from stats.util import cpu_count, format_listen_address
 from stats.config import params
+from stats.auth.main import authdb_migrate
 
 if params.debug:
     workers = 1
@@ -43,9 +46,19 @@ class CustomWSGI(BaseApplication):
         return self.application
 
 
+def child_exit(server, worker):
+    """Remove the live gauges of a worker that has exited."""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        # Third Party
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
+
+
 def start(**kwargs):
     """Start hyperglass via gunicorn."""
-    # Project
+    # Migrate the database once, rather than in each worker.
+    asyncio.run(authdb_migrate())
 
     CustomWSGI(
         app="stats.api.main:api",
@@ -61,6 +74,7 @@ def start(**kwargs):
             "loglevel": loglevel,
             "accesslog": "-",
             "errorlog": "-",
+            "child_exit": child_exit,
             # "logconfig_dict": {"formatters": {"generic": {"format": "%(message)s"}}},
             **kwargs,
         },
@@ -0,0 +1,209 @@
+"""Worker memory usage & allocation tracking.
+
+Each worker's RSS is exported as a gauge. When `memory.tracemalloc` is
+enabled, Python allocations are traced with `tracemalloc`, and the peak
+memory allocated during each request, and during each stage of building
+a response, is recorded by `track()`.
+
+`tracemalloc` only tracks a single, process-wide peak, so it's reset at
+the start of each tracked block, after its current value is carried over
+to any enclosing blocks. When requests overlap, a block's peak may
+include other requests' allocations, so recorded peaks are upper bounds.
+"""
+
+# Standard Library
+import os
+import sys
+import asyncio
+import resource
+import tracemalloc
+from typing import Any, Dict, List, Optional
+from contextlib import nullcontext
+
+# Project
+from stats.log import log
+from stats.config import params
+from stats.metrics import (
+    WORKER_RSS,
+    TRACED_MEMORY,
+    WORKER_PEAK_RSS,
+    STAGE_MEMORY_PEAK,
+    REQUEST_MEMORY_PEAK,
+)
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+_NOT_TRACKED = nullcontext()
+
+
+def rss_bytes() -> Optional[int]:
+    """Get the current resident set size of this process."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def peak_rss_bytes() -> int:
+    """Get the peak resident set size of this process."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in bytes on macOS, and kilobytes elsewhere.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class PeakStats:
+    """Aggregate peak allocations of a request endpoint or stage."""
+
+    __slots__ = ("count", "total", "max")
+
+    def __init__(self) -> None:
+        """Initialize PeakStats()."""
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def add(self, peak: int) -> None:
+        """Add a peak allocation."""
+        self.count += 1
+        self.total += peak
+        self.max = max(self.max, peak)
+
+    def dict(self) -> Dict[str, Any]:
+        """Get the statistics as a dictionary."""
+        return {
+            "count": self.count,
+            "mean": self.total // self.count if self.count else 0,
+            "max": self.max,
+        }
+
+
+stage_peaks: Dict[str, PeakStats] = {}
+endpoint_peaks: Dict[str, PeakStats] = {}
+
+# Tracked blocks that haven't exited yet.
+_active: List["TrackedBlock"] = []
+
+
+class TrackedBlock:
+    """Record the peak memory allocated during a `with` block."""
+
+    __slots__ = ("name", "request", "start", "peak")
+
+    def __init__(self, name: Optional[str], request: bool = False) -> None:
+        """Initialize TrackedBlock()."""
+        self.name = name
+        self.request = request
+
+    def __enter__(self) -> "TrackedBlock":
+        """Reset the peak, carrying it over to enclosing blocks."""
+        current, peak = tracemalloc.get_traced_memory()
+        for block in _active:
+            block.peak = max(block.peak, peak)
+        tracemalloc.reset_peak()
+        self.start = current
+        self.peak = current
+        _active.append(self)
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        """Record the block's peak allocation."""
+        _active.remove(self)
+        peak = max(self.peak, tracemalloc.get_traced_memory()[1]) - self.start
+
+        if self.name is None:
+            return
+
+        if self.request:
+            peaks, histogram = endpoint_peaks, REQUEST_MEMORY_PEAK
+        else:
+            peaks, histogram = stage_peaks, STAGE_MEMORY_PEAK
+
+        if self.name not in peaks:
+            peaks[self.name] = PeakStats()
+        peaks[self.name].add(peak)
+        histogram.labels(self.name).observe(peak)
+
+
+def track(stage: str):
+    """Record the peak allocation of a stage, if allocations are traced."""
+    if not tracemalloc.is_tracing():
+        return _NOT_TRACKED
+    return TrackedBlock(stage)
+
+
+def peak_allocations(peaks: Dict[str, PeakStats]) -> List[Dict[str, Any]]:
+    """List recorded peaks, largest first."""
+    ordered = sorted(peaks.items(), key=lambda item: item[1].max, reverse=True)
+    return [{"name": name, **stats.dict()} for name, stats in ordered]
+
+
+def top_allocations(group_by: str = "lineno", limit: int = 20) -> List[Dict[str, Any]]:
+    """Get the source locations with the most memory currently allocated."""
+    snapshot = tracemalloc.take_snapshot().filter_traces(
+        (
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*"),
+            tracemalloc.Filter(False, "<unknown>"),
+        )
+    )
+    return [
+        {
+            "site": "; ".join(str(frame) for frame in stat.traceback),
+            "size": stat.size,
+            "count": stat.count,
+        }
+        for stat in snapshot.statistics(group_by)[:limit]
+    ]
+
+
+def start_tracing(frames: int) -> None:
+    """Start tracing allocations, keeping `frames` frames per allocation."""
+    if not hasattr(tracemalloc, "reset_peak"):
+        log.warning("Memory allocation tracking requires Python 3.9 or later")
+        return
+    tracemalloc.start(frames)
+
+
+def stop_tracing() -> None:
+    """Stop tracing allocations & clear the recorded peaks."""
+    tracemalloc.stop()
+    stage_peaks.clear()
+    endpoint_peaks.clear()
+
+
+class MemoryMonitor:
+    """Periodically export this process's memory usage."""
+
+    def __init__(self, interval: float) -> None:
+        """Initialize MemoryMonitor()."""
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def update() -> None:
+        """Update the memory gauges."""
+        rss = rss_bytes()
+        if rss is not None:
+            WORKER_RSS.set(rss)
+        WORKER_PEAK_RSS.set(peak_rss_bytes())
+        if tracemalloc.is_tracing():
+            TRACED_MEMORY.set(tracemalloc.get_traced_memory()[0])
+
+    async def _run(self) -> None:
+        while True:
+            self.update()
+            await asyncio.sleep(self.interval)
+
+    async def start(self) -> None:
+        """Start exporting memory usage."""
+        self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        """Stop exporting memory usage."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+memory_monitor = MemoryMonitor(params.memory.sample_interval)
@@ -0,0 +1,134 @@
+"""Prometheus metrics.
+
+When the API is run by gunicorn, each worker writes its metrics to files
+in a shared directory, which `/metrics` aggregates across all workers.
+The directory must be set up with `stats.util.setup_metrics_dir()` before
+this module is first imported.
+"""
+
+# Standard Library
+import os
+
+# Third Party
+from prometheus_client import (
+    REGISTRY,
+    Gauge,
+    Counter,
+    Histogram,
+    CollectorRegistry,
+    generate_latest,
+)
+from prometheus_client.multiprocess import MultiProcessCollector
+
+MULTIPROCESS_ENV = "PROMETHEUS_MULTIPROC_DIR"
+
+# Sub-millisecond to multi-second, for event loop lag & password hashing.
+FINE_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+)
+
+# 64KiB to 1GiB, in powers of 4.
+MEMORY_BUCKETS = tuple(4 ** n * 65536 for n in range(8))
+
+REQUEST_LATENCY = Histogram(
+    "stats_http_request_duration_seconds",
+    "HTTP request latency, by endpoint.",
+    ("method", "endpoint", "status"),
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "stats_http_requests_in_flight",
+    "HTTP requests currently being handled.",
+    multiprocess_mode="livesum",
+)
+INFLUX_QUERY_LATENCY = Histogram(
+    "stats_influx_query_duration_seconds",
+    "InfluxDB query latency, by query kind.",
+    ("kind",),
+)
+ARGON2_LATENCY = Histogram(
+    "stats_argon2_verify_duration_seconds",
+    "Time taken to verify a password hash.",
+    buckets=FINE_BUCKETS,
+)
+CACHE_REQUESTS = Counter(
+    "stats_cache_requests_total",
+    "Cache lookups, by cache & result.",
+    ("cache", "result"),
+)
+RESPONSE_CACHE_BYTES = Gauge(
+    "stats_response_cache_bytes",
+    "Size of cached responses.",
+    multiprocess_mode="livesum",
+)
+RPC_CONNECTIONS = Gauge(
+    "stats_rpc_connections",
+    "Policy server connections, by state.",
+    ("state",),
+    multiprocess_mode="livesum",
+)
+JOB_ACTIONS_RUNNING = Gauge(
+    "stats_job_actions_running",
+    "Queued job actions currently running.",
+    multiprocess_mode="livesum",
+)
+LOOP_LAG = Histogram(
+    "stats_event_loop_lag_seconds",
+    "Delay between when a callback is due & when the event loop runs it.",
+    buckets=FINE_BUCKETS,
+)
+LOOP_STALLS = Counter(
+    "stats_event_loop_stalls_total",
+    "Times the event loop was blocked for longer than the stall threshold, "
+    "by the code blocking it.",
+    ("site",),
+)
+
+WORKER_RSS = Gauge(
+    "stats_worker_rss_bytes",
+    "Resident set size of each worker.",
+    multiprocess_mode="all",
+)
+WORKER_PEAK_RSS = Gauge(
+    "stats_worker_peak_rss_bytes",
+    "Peak resident set size of each worker.",
+    multiprocess_mode="all",
+)
+TRACED_MEMORY = Gauge(
+    "stats_worker_traced_bytes",
+    "Memory allocated by Python in each worker, if allocations are traced.",
+    multiprocess_mode="all",
+)
+REQUEST_MEMORY_PEAK = Histogram(
+    "stats_request_memory_peak_bytes",
+    "Peak memory allocated while handling a request, by endpoint.",
+    ("endpoint",),
+    buckets=MEMORY_BUCKETS,
+)
+STAGE_MEMORY_PEAK = Histogram(
+    "stats_stage_memory_peak_bytes",
+    "Peak memory allocated by each stage of building a response.",
+    ("stage",),
+    buckets=MEMORY_BUCKETS,
+)
+
+
+def render_metrics() -> bytes:
+    """Render the metrics of all processes in the Prometheus text format."""
+    if MULTIPROCESS_ENV in os.environ:
+        registry = CollectorRegistry()
+        MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry)
@@ -0,0 +1,88 @@
+"""Diagnostic Models."""
+
+# Standard Library
+from enum import Enum
+from typing import List, Optional
+from datetime import datetime
+
+# Third Party
+from pydantic import BaseModel, StrictInt, StrictStr, StrictBool
+
+
+class QuerySort(str, Enum):
+    """Query statistics sort keys."""
+
+    total = "total"
+    count = "count"
+    mean = "mean"
+    max = "max"
+    rows = "rows"
+    bytes = "bytes"
+
+
+class ProfileMode(str, Enum):
+    """Worker profiling modes."""
+
+    sample = "sample"
+    cprofile = "cprofile"
+
+
+class AllocationGroup(str, Enum):
+    """Allocation site grouping."""
+
+    lineno = "lineno"
+    filename = "filename"
+    traceback = "traceback"
+
+
+class QueryFingerprint(BaseModel):
+    """Statistics of InfluxDB queries sharing a fingerprint."""
+
+    fingerprint: StrictStr
+    kind: StrictStr
+    count: StrictInt
+    slow: StrictInt
+    total: float
+    mean: float
+    max: float
+    rows: StrictInt
+    bytes: StrictInt
+
+
+class QueryReport(BaseModel):
+    """Response Model for InfluxDB Query Statistics Request."""
+
+    pid: StrictInt
+    since: datetime
+    threshold: float
+    fingerprints: List[QueryFingerprint]
+
+
+class PeakAllocation(BaseModel):
+    """Peak memory allocated by a request endpoint or stage."""
+
+    name: StrictStr
+    count: StrictInt
+    mean: StrictInt
+    max: StrictInt
+
+
+class AllocationSite(BaseModel):
+    """Memory currently allocated by a source location."""
+
+    site: StrictStr
+    size: StrictInt
+    count: StrictInt
+
+
+class MemoryReport(BaseModel):
+    """Response Model for Worker Memory Request."""
+
+    pid: StrictInt
+    rss: Optional[StrictInt]
+    peak_rss: StrictInt
+    tracing: StrictBool
+    traced: Optional[StrictInt]
+    endpoints: List[PeakAllocation]
+    stages: List[PeakAllocation]
+    top: List[AllocationSite]
@@ -0,0 +1,17 @@
+"""API Token Models."""
+
+# Standard Library
+from typing import List
+from datetime import datetime
+
+# Third Party
+from pydantic import BaseModel, StrictStr
+
+
+class TokenResponse(BaseModel):
+    """Response Model for API Token Request."""
+
+    token: StrictStr
+    token_type: StrictStr = "bearer"
+    expires: datetime
+    routes: List[StrictStr]
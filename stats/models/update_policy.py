@@ -1,7 +1,8 @@
 """Route Policy Models."""
 
 # Standard Library
-from typing import Optional
+from enum import Enum
+from typing import List, Optional
 from datetime import datetime
 
 # Third Party
@@ -17,3 +18,17 @@ class UpdatePolicyResponse(BaseModel):
     request_time: datetime
     complete_time: Optional[datetime]
     requestor: StrictStr
+
+
+class JobStatus(str, Enum):
+    """Job status filter values."""
+
+    in_progress = "in_progress"
+    complete = "complete"
+
+
+class JobListResponse(BaseModel):
+    """Response Model for Job List Request."""
+
+    jobs: List[UpdatePolicyResponse]
+    next_cursor: Optional[StrictStr]
@@ -0,0 +1,149 @@
+"""Profile a running worker process.
+
+Two profilers are available:
+
+- `SamplingProfiler` samples the stacks of the event loop thread, and
+  optionally all other threads, from a background thread at a fixed
+  interval. Its overhead doesn't depend on how much code runs, so it's
+  safe to use under load. Samples are aggregated as collapsed stacks,
+  which most flame graph tools read directly.
+
+- `profile_calls()` instruments every call made on the event loop thread
+  with `cProfile`, for exact call counts & timings, at the cost of
+  slowing the worker down while the profile runs. The result is the
+  marshalled `pstats` data, as written by `pstats.Stats.dump_stats()`.
+"""
+
+# Standard Library
+import sys
+import time
+import asyncio
+import marshal
+import cProfile
+import threading
+from typing import Dict, List, Tuple
+from collections import Counter
+
+# Project
+from stats.exceptions import RequestError
+
+# Only one profile is run at a time, per process.
+_profile_lock = threading.Lock()
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}:{code.co_name}"
+
+
+def _collapse(frame, max_depth: int) -> Tuple[str, ...]:
+    """Get a stack's frame names, from outermost to innermost."""
+    names: List[str] = []
+    while frame is not None and len(names) < max_depth:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+    names.reverse()
+    return tuple(names)
+
+
+class SamplingProfiler:
+    """Periodically sample thread stacks from a background thread."""
+
+    def __init__(
+        self,
+        thread_id: int,
+        interval: float = 0.005,
+        all_threads: bool = False,
+        max_depth: int = 128,
+    ) -> None:
+        """Initialize SamplingProfiler()."""
+        self.thread_id = thread_id
+        self.interval = interval
+        self.all_threads = all_threads
+        self.max_depth = max_depth
+        self.samples: Counter = Counter()
+        self.sample_count = 0
+
+    def _sample(self, names: Dict[int, str]) -> None:
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == threading.get_ident():
+                continue
+            if not self.all_threads and thread_id != self.thread_id:
+                continue
+            thread = names.get(thread_id, str(thread_id))
+            self.samples[(thread, *_collapse(frame, self.max_depth))] += 1
+        self.sample_count += 1
+
+    def run(self, seconds: float) -> None:
+        """Sample stacks for `seconds`, blocking the calling thread."""
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        deadline = time.monotonic() + seconds
+        next_sample = time.monotonic()
+
+        while next_sample < deadline:
+            self._sample(names)
+            next_sample += self.interval
+            delay = next_sample - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                # Fell behind, so skip missed samples rather than bursting.
+                next_sample = time.monotonic()
+
+    def collapsed(self) -> str:
+        """Format samples as collapsed stacks, one `frame;frame;... count` per line."""
+        lines = (
+            f"{';'.join(stack)} {count}" for stack, count in self.samples.most_common()
+        )
+        return "\n".join(lines) + "\n"
+
+
+async def sample_stacks(
+    seconds: float, interval: float, all_threads: bool = False
+) -> str:
+    """Sample the event loop thread's stacks, as collapsed stacks."""
+    if not _profile_lock.acquire(blocking=False):
+        raise RequestError("A profile is already running", status_code=409)
+
+    loop = asyncio.get_running_loop()
+    done = loop.create_future()
+    profiler = SamplingProfiler(
+        threading.get_ident(), interval=interval, all_threads=all_threads
+    )
+
+    def finish() -> None:
+        if not done.done():
+            done.set_result(None)
+
+    def run() -> None:
+        try:
+            profiler.run(seconds)
+        finally:
+            # Released by the sampling thread, so a cancelled request can't
+            # start another profile while this one is still sampling.
+            _profile_lock.release()
+            loop.call_soon_threadsafe(finish)
+
+    # A dedicated thread, so sampling can't be delayed by a busy executor.
+    threading.Thread(target=run, name="profiler", daemon=True).start()
+    await done
+    return profiler.collapsed()
+
+
+async def profile_calls(seconds: float) -> bytes:
+    """Profile all calls on the event loop thread, as marshalled pstats data."""
+    if not _profile_lock.acquire(blocking=False):
+        raise RequestError("A profile is already running", status_code=409)
+
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            profiler.disable()
+        profiler.create_stats()
+        return marshal.dumps(profiler.stats)
+    finally:
+        _profile_lock.release()
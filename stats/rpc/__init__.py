@@ -0,0 +1 @@
+"""RPC Client Utilities."""
@@ -0,0 +1,227 @@
+"""Pool of persistent RPyC connections for use from asyncio."""
+
+# Standard Library
+import time
+import asyncio
+from typing import Any, List, Tuple, Optional, Sequence, Generator, AsyncIterator
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# Third Party
+import rpyc
+from rpyc.core import Connection
+
+# Project
+from stats.log import log
+from stats.metrics import RPC_CONNECTIONS
+
+_DONE = object()
+
+_IN_USE = RPC_CONNECTIONS.labels("in_use")
+_IDLE = RPC_CONNECTIONS.labels("idle")
+
+
+def _items(result: Any) -> Sequence:
+    """Get the items of a remote result to stream."""
+    if isinstance(result, str):
+        return (result,)
+    if isinstance(result, (Sequence, Generator)):
+        return result
+    return ()
+
+
+class RpcPool:
+    """Persistent, heartbeat-checked RPyC connections.
+
+    RPyC is synchronous, so connecting & calling remote methods is run in
+    a dedicated thread pool, one thread per connection, rather than on the
+    event loop. At most `size` calls run at once, and further calls wait
+    for a free connection.
+
+    Idle connections are pinged before reuse if they haven't been used in
+    `heartbeat` seconds, and are replaced if the ping fails. Connections
+    are closed if a call times out or is cancelled, which also unblocks
+    the thread waiting on the remote call.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        size: int = 2,
+        timeout: float = 300,
+        connect_timeout: float = 5,
+        heartbeat: float = 30,
+    ) -> None:
+        """Initialize RpcPool()."""
+        self.host = host
+        self.port = port
+        self.size = size
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.heartbeat = heartbeat
+        self._idle: List[Tuple[Connection, float]] = []
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix="rpyc")
+
+    @property
+    def slots(self) -> asyncio.Semaphore:
+        """Limit concurrent calls to the pool size."""
+        # Created lazily, so the semaphore is bound to the running loop.
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.size)
+        return self._slots
+
+    def _connect(self) -> Connection:
+        return rpyc.connect(
+            self.host,
+            self.port,
+            ipv6=True,
+            keepalive=True,
+            config={"sync_request_timeout": self.timeout},
+        )
+
+    def _alive(self, connection: Connection) -> bool:
+        if connection.closed:
+            return False
+        try:
+            connection.ping(timeout=self.connect_timeout)
+        except Exception:
+            return False
+        return True
+
+    @staticmethod
+    def _close(connection: Connection) -> None:
+        try:
+            connection.close()
+        except Exception as err:
+            log.debug("Error closing RPC connection: {}", repr(err))
+
+    def _close_late(self, future: Future) -> None:
+        """Close a connection opened after its caller stopped waiting for it."""
+        if not future.cancelled() and future.exception() is None:
+            self._close(future.result())
+
+    def _discard(self, connection: Connection) -> None:
+        """Close a connection that a thread may be blocked on.
+
+        `Connection.close()` waits for the pending request, so the socket
+        is shut down first, which immediately fails the blocked request &
+        frees its thread.
+        """
+        try:
+            connection._channel.stream.close()
+        except Exception as err:
+            log.debug("Error aborting RPC connection: {}", repr(err))
+        asyncio.get_running_loop().run_in_executor(None, self._close, connection)
+
+    def _abort(self, connection: Connection) -> None:
+        """Close an in-use connection, whose state is unknown."""
+        _IN_USE.dec()
+        self._discard(connection)
+
+    async def _run(self, func, *args, timeout: float) -> Any:
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._executor, func, *args)
+        return await asyncio.wait_for(future, timeout)
+
+    async def _checkout(self) -> Connection:
+        """Get a live idle connection, or open a new one."""
+        while self._idle:
+            connection, last_used = self._idle.pop()
+            _IDLE.dec()
+
+            if time.monotonic() - last_used < self.heartbeat:
+                return connection
+
+            try:
+                alive = await self._run(
+                    self._alive, connection, timeout=self.connect_timeout * 2
+                )
+            except asyncio.TimeoutError:
+                alive = False
+            except BaseException:
+                self._discard(connection)
+                raise
+
+            if alive:
+                return connection
+
+            log.debug("Replacing dead RPC connection to {}", self.host)
+            # The ping may still be waiting on the connection.
+            self._discard(connection)
+
+        return await self._open()
+
+    async def _open(self) -> Connection:
+        """Open a new connection."""
+        future = self._executor.submit(self._connect)
+        try:
+            return await asyncio.wait_for(
+                asyncio.wrap_future(future), self.connect_timeout
+            )
+        except BaseException:
+            # The connection may still be opened after a timeout or
+            # cancellation, in which case it's closed as soon as it is.
+            future.add_done_callback(self._close_late)
+            raise
+
+    async def _acquire(self) -> Connection:
+        """Get a connection, which must be released or aborted after use."""
+        connection = await self._checkout()
+        _IN_USE.inc()
+        return connection
+
+    def _release(self, connection: Connection) -> None:
+        """Return a connection to the pool for reuse."""
+        _IN_USE.dec()
+        self._idle.append((connection, time.monotonic()))
+        _IDLE.inc()
+
+    async def stream(
+        self, method: str, *args: Any, timeout: Optional[float] = None, **kwargs: Any
+    ) -> AsyncIterator[str]:
+        """Call a remote method, yielding each item of its result as it arrives.
+
+        Remote generators are iterated on the RPC thread, and each item is
+        handed to the event loop as soon as it's received. A string result
+        is yielded as a single item. `timeout` applies to the whole call.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + (timeout or self.timeout)
+        items: asyncio.Queue = asyncio.Queue()
+
+        def produce(connection: Connection) -> None:
+            try:
+                result = getattr(connection.root, method)(*args, **kwargs)
+                for item in _items(result):
+                    loop.call_soon_threadsafe(items.put_nowait, str(item))
+            except BaseException as err:
+                loop.call_soon_threadsafe(items.put_nowait, err)
+            loop.call_soon_threadsafe(items.put_nowait, _DONE)
+
+        async with self.slots:
+            connection = await self._acquire()
+            producer = loop.run_in_executor(self._executor, produce, connection)
+            try:
+                while True:
+                    item = await asyncio.wait_for(
+                        items.get(), max(deadline - loop.time(), 0)
+                    )
+                    if item is _DONE:
+                        break
+                    if isinstance(item, BaseException):
+                        raise item
+                    yield item
+            except BaseException:
+                self._abort(connection)
+                raise
+
+            await producer
+            self._release(connection)
+
+    def close(self) -> None:
+        """Close all idle connections."""
+        while self._idle:
+            connection, _ = self._idle.pop()
+            _IDLE.dec()
+            self._close(connection)
@@ -0,0 +1,329 @@
+"""Lightweight request tracing.
+
+Spans are recorded only while a request is being traced, which is done
+by `TracingMiddleware` when tracing is enabled. Otherwise, `span()` is a
+single context variable lookup, so instrumented code paths are left in
+place permanently.
+
+Traced requests' span durations are summed by name & returned in the
+`Server-Timing` header, and complete traces can be appended to a file
+in the OpenTelemetry (OTLP) JSON format, one trace per line, which an
+OpenTelemetry collector can import with its `otlpjsonfile` receiver.
+"""
+
+# Standard Library
+import re
+import json
+import time
+import asyncio
+import secrets
+import functools
+from typing import Any, Dict, List, Callable, Optional
+from pathlib import Path
+from contextvars import ContextVar
+from concurrent.futures import ThreadPoolExecutor
+
+# Third Party
+from fastapi.routing import APIRoute
+from starlette.types import Send, Scope, ASGIApp, Message, Receive
+from starlette.requests import Request
+from starlette.datastructures import Headers, MutableHeaders
+
+# Project
+from stats.log import log
+from stats.constants import __version__
+
+TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+# Response validation & encoding, after the endpoint returns.
+VALIDATE = "validate"
+
+
+class Span:
+    """Timed operation within a trace."""
+
+    __slots__ = ("trace", "name", "span_id", "parent_id", "start", "end", "attributes")
+
+    def __init__(
+        self,
+        trace: "Trace",
+        name: str,
+        parent_id: Optional[str],
+        attributes: Dict[str, Any],
+        start: Optional[int] = None,
+    ) -> None:
+        """Initialize Span()."""
+        self.trace = trace
+        self.name = name
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.start = start or time.perf_counter_ns()
+        self.end: Optional[int] = None
+        self.attributes = attributes
+
+    @property
+    def duration(self) -> float:
+        """Get the span's duration in milliseconds."""
+        return ((self.end or time.perf_counter_ns()) - self.start) / 1e6
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """Format the span as an OTLP JSON span."""
+        span = {
+            "traceId": self.trace.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 2 if self is self.trace.root else 1,
+            "startTimeUnixNano": str(self.trace.unix_ns(self.start)),
+            "endTimeUnixNano": str(self.trace.unix_ns(self.end or self.start)),
+            "attributes": [
+                {"key": key, "value": _otlp_value(value)}
+                for key, value in self.attributes.items()
+            ],
+        }
+        if self.parent_id is not None:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+class Trace:
+    """Spans recorded while handling a single request."""
+
+    __slots__ = ("trace_id", "root", "spans", "_epoch_ns", "_perf_ns")
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: Optional[str] = None,
+        parent_id: Optional[str] = None,
+        **attributes: Any,
+    ) -> None:
+        """Initialize Trace()."""
+        self._epoch_ns = time.time_ns()
+        self._perf_ns = time.perf_counter_ns()
+        self.trace_id = trace_id or secrets.token_hex(16)
+        self.spans: List[Span] = []
+        self.root = Span(self, name, parent_id, attributes, start=self._perf_ns)
+
+    def unix_ns(self, perf_ns: int) -> int:
+        """Convert a performance counter timestamp to UNIX nanoseconds."""
+        return self._epoch_ns + perf_ns - self._perf_ns
+
+    def server_timing(self) -> str:
+        """Sum span durations by name, as a `Server-Timing` header value."""
+        durations: Dict[str, float] = {}
+        for span in self.spans:
+            durations[span.name] = durations.get(span.name, 0) + span.duration
+        durations["total"] = self.root.duration
+        return ", ".join(f"{name};dur={dur:.3f}" for name, dur in durations.items())
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """Format the trace as an OTLP JSON trace export request."""
+        resource = {
+            "attributes": [
+                {"key": "service.name", "value": {"stringValue": "48ix-stats"}},
+                {"key": "service.version", "value": {"stringValue": __version__}},
+            ]
+        }
+        spans = [span.to_otlp() for span in (self.root, *self.spans)]
+        return {
+            "resourceSpans": [
+                {
+                    "resource": resource,
+                    "scopeSpans": [{"scope": {"name": "stats"}, "spans": spans}],
+                }
+            ]
+        }
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+# The innermost active span of the current request, if it's being traced.
+_active: ContextVar[Optional[Span]] = ContextVar("active_span", default=None)
+
+
+class _SpanContext:
+    """Record a span for the duration of a `with` block."""
+
+    __slots__ = ("parent", "name", "attributes", "span", "token")
+
+    def __init__(self, parent: Span, name: str, attributes: Dict[str, Any]) -> None:
+        self.parent = parent
+        self.name = name
+        self.attributes = attributes
+
+    def __enter__(self) -> Span:
+        trace = self.parent.trace
+        self.span = Span(trace, self.name, self.parent.span_id, self.attributes)
+        trace.spans.append(self.span)
+        self.token = _active.set(self.span)
+        return self.span
+
+    def __exit__(self, *args: Any) -> None:
+        self.span.end = time.perf_counter_ns()
+        _active.reset(self.token)
+
+
+class _NoSpan:
+    """Do nothing, when the current request isn't being traced."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *args: Any) -> None:
+        return None
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(name: str, **attributes: Any):
+    """Record a span around a `with` block, if the request is being traced."""
+    parent = _active.get()
+    if parent is None:
+        return _NO_SPAN
+    return _SpanContext(parent, name, attributes)
+
+
+def current_trace() -> Optional[Trace]:
+    """Get the trace of the current request, if it's being traced."""
+    active = _active.get()
+    if active is None:
+        return None
+    return active.trace
+
+
+class FileExporter:
+    """Append complete traces to a file, from a background thread."""
+
+    def __init__(self, path: Path) -> None:
+        """Initialize FileExporter()."""
+        self.path = path
+        self._file = None
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="trace-export"
+        )
+
+    def _write(self, trace: Trace) -> None:
+        line = json.dumps(trace.to_otlp(), separators=(",", ":"))
+        try:
+            if self._file is None:
+                self._file = self.path.open("a", buffering=1)
+            self._file.write(line + "\n")
+        except OSError as err:
+            log.error("Error exporting trace to {}: {}", str(self.path), repr(err))
+
+    def export(self, trace: Trace) -> None:
+        """Queue a complete trace to be encoded & written."""
+        self._executor.submit(self._write, trace)
+
+
+class TracingMiddleware:
+    """Trace each request, adding a `Server-Timing` header to its response.
+
+    A W3C `traceparent` request header, if present, is used as the trace's
+    ID & parent span, so exported spans join the caller's trace.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        server_timing: bool = True,
+        exporter: Optional[FileExporter] = None,
+    ) -> None:
+        """Initialize TracingMiddleware()."""
+        self.app = app
+        self.server_timing = server_timing
+        self.exporter = exporter
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Trace the request."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace_id = parent_id = None
+        traceparent = TRACEPARENT.match(Headers(scope=scope).get("traceparent", ""))
+        if traceparent is not None:
+            trace_id, parent_id = traceparent.groups()
+
+        trace = Trace(
+            f"{scope['method']} {scope['path']}",
+            trace_id=trace_id,
+            parent_id=parent_id,
+            **{"http.method": scope["method"], "http.target": scope["path"]},
+        )
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                trace.root.attributes["http.status_code"] = message["status"]
+                if self.server_timing:
+                    headers = MutableHeaders(scope=message)
+                    headers.append("server-timing", trace.server_timing())
+            await send(message)
+
+        token = _active.set(trace.root)
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _active.reset(token)
+            trace.root.end = time.perf_counter_ns()
+            endpoint = getattr(scope.get("endpoint"), "__name__", None)
+            if endpoint is not None:
+                trace.root.attributes["http.route"] = endpoint
+            if self.exporter is not None:
+                self.exporter.export(trace)
+
+
+def _trace_endpoint(endpoint: Callable) -> Callable:
+    @functools.wraps(endpoint)
+    async def traced(**kwargs: Any) -> Any:
+        with span("endpoint"):
+            return await endpoint(**kwargs)
+
+    return traced
+
+
+class TracedRoute(APIRoute):
+    """API route that traces its endpoint, and its response handling.
+
+    Response handling includes validation against the response model &
+    encoding, which FastAPI does after the endpoint returns.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        """Initialize TracedRoute()."""
+        super().__init__(*args, **kwargs)
+        if asyncio.iscoroutinefunction(self.dependant.call):
+            # The route handler looks up the endpoint on each request.
+            self.dependant.call = _trace_endpoint(self.dependant.call)
+
+    def get_route_handler(self) -> Callable:
+        """Trace the time between the endpoint returning & the response."""
+        handler = super().get_route_handler()
+
+        async def traced_handler(request: Request) -> Any:
+            response = await handler(request)
+            trace = current_trace()
+            if trace is not None:
+                endpoint = next(
+                    (s for s in reversed(trace.spans) if s.name == "endpoint"), None
+                )
+                if endpoint is not None and endpoint.end is not None:
+                    validate = Span(
+                        trace, VALIDATE, trace.root.span_id, {}, start=endpoint.end
+                    )
+                    validate.end = time.perf_counter_ns()
+                    trace.spans.append(validate)
+            return response
+
+        return traced_handler
@@ -2,6 +2,7 @@
 # Standard Library
 import re
 from typing import Union
+from pathlib import Path
 from ipaddress import IPv4Address, IPv6Address
 
 # Project
@@ -86,6 +87,22 @@ def cpu_count(multiplier: int = 0):
     return multiprocessing.cpu_count() * multiplier
 
 
+def setup_metrics_dir(path: Path) -> None:
+    """Share Prometheus metrics between worker processes via `path`.
+
+    Must be called before `prometheus_client` is imported. Metrics left by
+    a previous run are removed, so counters start from zero.
+    """
+    # Standard Library
+    import os
+    import shutil
+
+    if path.exists():
+        shutil.rmtree(path)
+    path.mkdir(parents=True)
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = str(path)
+
+
 def format_listen_address(listen_address: Union[IPv4Address, IPv6Address, str]) -> str:
     """Format a listen_address for gunicorn."""
     fmt = str(listen_address)
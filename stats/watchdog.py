@@ -0,0 +1,120 @@
+"""Event loop lag monitor & blocking call detector.
+
+A heartbeat task on the event loop sleeps for a fixed interval & records
+how late it wakes up, which is how long any callback waiting on the loop
+is delayed. A watchdog thread checks the heartbeat, and when the loop
+hasn't run it for longer than the stall threshold, captures the stack of
+the event loop thread, which is whatever synchronous code is blocking it.
+
+Each stall is logged once with its stack, and counted by the innermost
+frame of this package's code, as that's usually the call that should be
+awaited or moved to an executor.
+"""
+
+# Standard Library
+import sys
+import time
+import asyncio
+import threading
+import traceback
+from typing import Optional
+
+# Project
+from stats.log import log
+from stats.config import params
+from stats.metrics import LOOP_LAG, LOOP_STALLS
+
+
+def blocking_site(frame) -> str:
+    """Get the innermost frame of this package's code in a stack."""
+    innermost = None
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "?")
+        name = f"{module}:{frame.f_code.co_name}"
+        if innermost is None:
+            innermost = name
+        if module.startswith("stats.") and module != __name__:
+            return name
+        frame = frame.f_back
+    return innermost or "?"
+
+
+class LoopMonitor:
+    """Measure event loop lag, and report the stack of calls that block it."""
+
+    def __init__(self, interval: float, stall_threshold: float) -> None:
+        """Initialize LoopMonitor()."""
+        self.interval = interval
+        self.stall_threshold = stall_threshold
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._loop_thread_id: Optional[int] = None
+        self._last_beat = time.monotonic()
+
+    async def _heartbeat(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            due = loop.time() + self.interval
+            self._last_beat = time.monotonic()
+            await asyncio.sleep(self.interval)
+            LOOP_LAG.observe(max(loop.time() - due, 0))
+
+    def _stalled_for(self) -> float:
+        return time.monotonic() - self._last_beat - self.interval
+
+    def _report(self, stalled: float) -> None:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return
+        site = blocking_site(frame)
+        stack = "".join(traceback.format_stack(frame))
+        del frame
+        LOOP_STALLS.labels(site).inc()
+        log.warning(
+            "Event loop blocked for {:.3f}s by {}, at:\n{}", stalled, site, stack
+        )
+
+    def _watch(self) -> None:
+        check_interval = self.stall_threshold / 4
+        stall_start: Optional[float] = None
+
+        while not self._stopped.wait(check_interval):
+            stalled = self._stalled_for()
+
+            if stalled >= self.stall_threshold:
+                if stall_start != self._last_beat:
+                    # Report each stall once, while it's still blocking.
+                    stall_start = self._last_beat
+                    self._report(stalled)
+
+            elif stall_start is not None:
+                log.warning(
+                    "Event loop resumed after being blocked for {:.3f}s",
+                    self._last_beat - stall_start - self.interval,
+                )
+                stall_start = None
+
+    async def start(self) -> None:
+        """Start monitoring the running event loop."""
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.ensure_future(self._heartbeat())
+        self._thread = threading.Thread(
+            target=self._watch, name="loop-watchdog", daemon=True
+        )
+        self._thread.start()
+
+    async def stop(self) -> None:
+        """Stop monitoring the event loop."""
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self._thread = None
+
+
+loop_monitor = LoopMonitor(
+    interval=params.watchdog.interval, stall_threshold=params.watchdog.stall_threshold
+)